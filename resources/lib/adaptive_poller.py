@@ -0,0 +1,69 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+    script.skin.helper.service
+    Helper service and scripts for Kodi skins
+    adaptive_poller.py
+    Wait time of a polling loop which is short after user input and grows while nothing changes
+'''
+
+from utils import getCondVisibility
+
+
+class AdaptivePoller(object):
+    '''
+        the interval is reset to the minimum when the polled state changed or the user pressed a key,
+        it grows exponentially up to the maximum while the state stays the same
+    '''
+
+    def __init__(self, min_interval=0.15, max_interval=1.0, factor=1.5):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.factor = factor
+        self.interval = min_interval
+        self.ticks = 0
+        self.wakeups = 0
+
+    def configure(self, max_interval):
+        '''set the maximum interval'''
+        self.max_interval = max(max_interval, self.min_interval)
+
+    def tick(self, changed):
+        '''determine the next interval from the result of the current poll'''
+        self.ticks += 1
+        if changed:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.factor, self.max_interval)
+        return self.interval
+
+    def reset(self):
+        '''poll at the shortest interval'''
+        self.interval = self.min_interval
+
+    def wait(self, monitor):
+        '''
+            wait for the current interval, returns True if abort was requested.
+            a long wait is done in slices in which we only check for user input (System.IdleTime),
+            which is a lot cheaper than a full poll and prevents any extra latency after a keypress
+        '''
+        waited = 0
+        while True:
+            if monitor.waitForAbort(self.min_interval):
+                return True
+            waited += self.min_interval
+            if waited >= self.interval:
+                return False
+            if not getCondVisibility("System.IdleTime(1)"):
+                self.wakeups += 1
+                self.reset()
+                return False
+
+    def stats(self):
+        '''return a dict with the current interval and counters'''
+        return {
+            "interval": int(self.interval * 1000),
+            "ticks": self.ticks,
+            "wakeups": self.wakeups
+        }
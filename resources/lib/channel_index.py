@@ -0,0 +1,141 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+    script.skin.helper.service
+    Helper service and scripts for Kodi skins
+    channel_index.py
+    In-memory index of the pvr channels with their logos and the artwork of the airing programs
+'''
+
+import copy
+import threading
+import time
+from utils import kodi_json, log_msg
+from lru_cache import LRUCache
+from epg_tracker import parse_epg_time, get_genre
+
+# minimum number of seconds between two reloads of the channels (e.g. when an unknown channel is played)
+RELOAD_INTERVAL = 300
+# seconds between two builds of the index, the programs in the precompute window change in the meantime
+BUILD_INTERVAL = 1800
+# number of programs of which the artwork is precomputed in one go, the artwork might come from remote
+PRECOMPUTE_CHUNK = 2
+
+
+class ChannelIndex(object):
+    '''
+        the logos of all tv and radio channels, looked up by channel id or channel name, and the pvr artwork
+        of the current and next programs of all channels
+    '''
+
+    def __init__(self):
+        self.by_id = {}
+        self.by_name = {}
+        self.artwork = LRUCache(max_items=1000, ttl=6 * 3600)
+        self.last_load = 0
+        self.last_build = 0
+        self.precomputed = 0
+        self.pending = []
+        self._lock = threading.Lock()
+
+    def load(self):
+        '''read all channels with a single query per channel type, returns the current and next broadcasts'''
+        by_id = {}
+        by_name = {}
+        broadcasts = []
+        for group in ["alltv", "allradio"]:
+            params = {"channelgroupid": group, "properties": ["thumbnail", "broadcastnow", "broadcastnext"]}
+            for channel in kodi_json("PVR.GetChannels", params, "channels"):
+                by_id[channel["channelid"]] = channel.get("thumbnail", "")
+                by_name[channel["label"].lower()] = channel.get("thumbnail", "")
+                for key in ["broadcastnow", "broadcastnext"]:
+                    if channel.get(key, {}).get("title"):
+                        broadcasts.append((channel[key], channel["label"]))
+        with self._lock:
+            self.by_id = by_id
+            self.by_name = by_name
+            self.last_load = time.time()
+        log_msg("ChannelIndex - loaded %s channels" % len(by_id))
+        return broadcasts
+
+    def build_due(self):
+        '''returns True if the index has to be (re)built'''
+        return time.time() - self.last_build >= BUILD_INTERVAL
+
+    def build(self, precompute_limit=0, precompute_window=7200):
+        '''
+            load the channels and queue the programs airing now and starting within the window of which
+            the pvr artwork is not in the index yet, bounded by the limit. returns the number of queued programs.
+        '''
+        self.last_build = time.time()
+        broadcasts = self.load()
+        window_end = time.time() + precompute_window
+        pending = []
+        for broadcast, channelname in broadcasts:
+            if len(pending) >= precompute_limit:
+                break
+            try:
+                if parse_epg_time(broadcast["starttime"]) > window_end:
+                    continue
+            except (KeyError, ValueError):
+                continue
+            if not self.has_artwork(broadcast["title"], channelname):
+                pending.append((broadcast, channelname))
+        with self._lock:
+            self.pending = pending
+        log_msg("ChannelIndex - queued %s programs to precompute the artwork" % len(pending))
+        return len(pending)
+
+    def precompute(self, metadatautils, count=PRECOMPUTE_CHUNK):
+        '''precompute the pvr artwork of the next queued programs, returns False when the queue is empty'''
+        for _ in range(count):
+            with self._lock:
+                if not self.pending:
+                    break
+                broadcast, channelname = self.pending.pop(0)
+            if not self.has_artwork(broadcast["title"], channelname):
+                self.set_artwork(broadcast["title"], channelname, metadatautils.get_pvr_artwork(
+                    broadcast["title"], channelname, get_genre(broadcast)))
+                self.precomputed += 1
+        with self._lock:
+            return len(self.pending) > 0
+
+    def get_logo(self, channelid=None, channelname=""):
+        '''
+            returns the logo of the channel, None if the channel is unknown.
+            the channels are (re)loaded when needed, at most once per RELOAD_INTERVAL.
+        '''
+        for attempt in range(2):
+            with self._lock:
+                if channelid in self.by_id:
+                    return self.by_id[channelid]
+                if channelname and channelname.lower() in self.by_name:
+                    return self.by_name[channelname.lower()]
+            if attempt or time.time() - self.last_load < RELOAD_INTERVAL:
+                break
+            self.load()
+        return None
+
+    def get_artwork(self, title, channelname):
+        '''get a copy of the precomputed pvr artwork of a program, returns None if it's not in the index'''
+        artwork = self.artwork.get((title.lower(), channelname.lower()))
+        return copy.deepcopy(artwork) if artwork is not None else None
+
+    def has_artwork(self, title, channelname):
+        '''check if the pvr artwork of a program is in the index, not counted as a hit or miss of the player'''
+        return self.artwork.get((title.lower(), channelname.lower()), count=False) is not None
+
+    def set_artwork(self, title, channelname, artwork):
+        '''store the pvr artwork of a program'''
+        self.artwork.set((title.lower(), channelname.lower()), artwork)
+
+    def stats(self):
+        '''return a dict with the size of the index'''
+        return {
+            "channels": len(self.by_id),
+            "programs": len(self.artwork),
+            "precomputed": self.precomputed,
+            "pending": len(self.pending),
+            "hitratio": int(100 * self.artwork.stats()["hitratio"])
+        }
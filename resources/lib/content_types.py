@@ -0,0 +1,179 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+    script.skin.helper.service
+    Helper service and scripts for Kodi skins
+    content_types.py
+    Determine the content type of the current container/listitem from a rule table
+'''
+
+from utils import get_infolabels, getCondVisibility
+
+# the raw infolabels we need to classify the content
+CONTAINER_FACTS = ["Container.Content", "Container.FolderPath"]
+LISTITEM_FACTS = ["ListItem.DBTYPE", "ListItem.Property(DBTYPE)", "ListItem.FileNameAndPath", "ListItem.FolderPath",
+                  "ListItem.Genre", "ListItem.Artist", "ListItem.Label", "ListItem.Album", "ListItem.TvShowTitle",
+                  "ListItem.Title", "ListItem.Property(TotalEpisodes)", "ListItem.Season", "ListItem.Year",
+                  "ListItem.Property(ChannelLogo)"]
+# the Window.IsActive conditions of the rules, these can not be read as infolabel (filled by window_active)
+WINDOW_CONDITIONS = []
+
+
+def is_equal(label, value):
+    '''rule: infolabel equals value (case insensitive)'''
+    return lambda facts: facts[label].lower() == value
+
+
+def contains(label, value):
+    '''rule: infolabel contains value (case insensitive)'''
+    return lambda facts: value in facts[label].lower()
+
+
+def not_empty(label):
+    '''rule: infolabel has a value'''
+    return lambda facts: bool(facts[label])
+
+
+def is_empty(label):
+    '''rule: infolabel has no value'''
+    return lambda facts: not facts[label]
+
+
+def labels_equal(label_a, label_b):
+    '''rule: both infolabels have the same value (case insensitive)'''
+    return lambda facts: facts[label_a].lower() == facts[label_b].lower()
+
+
+def window_active(*windows):
+    '''rule: one of the given windows or dialogs is active'''
+    condition = " | ".join(["Window.IsActive(%s)" % window for window in windows])
+    if condition not in WINDOW_CONDITIONS:
+        WINDOW_CONDITIONS.append(condition)
+    return lambda facts: facts["windows"].is_active(condition)
+
+
+def all_of(*rules):
+    '''rule: all given rules match'''
+    return lambda facts: all(rule(facts) for rule in rules)
+
+
+def any_of(*rules):
+    '''rule: any of the given rules match'''
+    return lambda facts: any(rule(facts) for rule in rules)
+
+
+def not_(rule):
+    '''rule: the given rule does not match'''
+    return lambda facts: not rule(facts)
+
+
+def fact(label, suffix=""):
+    '''result: the value of the infolabel'''
+    return lambda facts: facts[label] + suffix
+
+
+# rules to determine the content type from the container, first match wins
+CONTAINER_RULES = [
+    ("episodes", is_equal("Container.Content", "episodes")),
+    ("movies", all_of(is_equal("Container.Content", "movies"), not_(contains("Container.FolderPath", "setid=")))),
+    ("sets", all_of(any_of(is_equal("Container.Content", "sets"),
+                           is_equal("Container.FolderPath", "videodb://movies/sets/")),
+                    not_(contains("Container.FolderPath", "setid=")))),
+    ("setmovies", contains("Container.FolderPath", "setid=")),
+    (fact("Container.Content"), all_of(not_empty("Container.Content"), not_(is_equal("Container.Content", "pvr")))),
+    ("tvshows", is_equal("Container.Content", "tvshows")),
+    ("seasons", is_equal("Container.Content", "seasons")),
+    ("musicvideos", is_equal("Container.Content", "musicvideos")),
+    ("songs", any_of(is_equal("Container.Content", "songs"),
+                     is_equal("Container.FolderPath", "musicdb://singles/"))),
+    ("artists", is_equal("Container.Content", "artists")),
+    ("albums", is_equal("Container.Content", "albums")),
+    ("tvchannels", window_active("MyPVRChannels.xml", "MyPVRGuide.xml", "MyPVRSearch.xml", "pvrguideinfo")),
+    ("tvrecordings", window_active("MyPVRRecordings.xml", "MyPVRTimers.xml", "pvrrecordinginfo")),
+    ("addons", window_active("programs", "addonbrowser")),
+    ("pictures", window_active("pictures")),
+    ("genres", is_equal("Container.Content", "genres")),
+    ("files", is_equal("Container.Content", "files"))
+]
+
+# the listitem rules are only used for the main container when the video info dialog is open
+MOVIEINFORMATION = window_active("movieinformation")
+
+# rules to determine the content type from the listitem properties, first match wins
+LISTITEM_RULES = [
+    (fact("ListItem.DBTYPE", "s"), not_empty("ListItem.DBTYPE")),
+    (fact("ListItem.Property(DBTYPE)", "s"), not_empty("ListItem.Property(DBTYPE)")),
+    ("tvrecordings", any_of(contains("ListItem.FileNameAndPath", "playrecording"),
+                            contains("ListItem.FileNameAndPath", "tvtimer"))),
+    ("tvchannels", contains("ListItem.FileNameAndPath", "launchpvr")),
+    ("tvchannels", contains("ListItem.FolderPath", "pvr://channels")),
+    ("tvshows", all_of(contains("ListItem.FolderPath", "flix2kodi"), contains("ListItem.Genre", "series"))),
+    ("movies", contains("ListItem.FolderPath", "flix2kodi")),
+    ("artists", all_of(not_empty("ListItem.Artist"), labels_equal("ListItem.Label", "ListItem.Artist"))),
+    ("albums", all_of(not_empty("ListItem.Album"), labels_equal("ListItem.Label", "ListItem.Album"))),
+    ("songs", all_of(not_empty("ListItem.Artist"), not_empty("ListItem.Album"))),
+    ("tvshows", all_of(not_empty("ListItem.TvShowTitle"), labels_equal("ListItem.Title", "ListItem.TvShowTitle"))),
+    ("tvshows", not_empty("ListItem.Property(TotalEpisodes)")),
+    ("episodes", all_of(not_empty("ListItem.TvShowTitle"), not_empty("ListItem.Season"))),
+    ("movies", all_of(is_empty("ListItem.TvShowTitle"), not_empty("ListItem.Year"))),
+    ("movies", contains("ListItem.FolderPath", "movies")),
+    ("tvshows", contains("ListItem.FolderPath", "shows")),
+    ("episodes", contains("ListItem.FolderPath", "episodes")),
+    ("tvchannels", not_empty("ListItem.Property(ChannelLogo)"))
+]
+
+
+def apply_rules(rules, facts):
+    '''returns the content type of the first matching rule'''
+    for content_type, rule in rules:
+        if rule(facts):
+            return content_type(facts) if callable(content_type) else content_type
+    return ""
+
+
+def classify_content_type(facts, containerprefix=""):
+    '''determine the content type from the given facts (dict with the raw infolabel values)'''
+    content_type = ""
+    if not containerprefix:
+        content_type = apply_rules(CONTAINER_RULES, facts)
+    # last resort: try to determine type by the listitem properties
+    if not content_type and (containerprefix or MOVIEINFORMATION(facts)):
+        content_type = apply_rules(LISTITEM_RULES, facts)
+    return content_type
+
+
+class ActiveWindows(object):
+    '''
+        the window conditions are read when a rule needs them: one combined condition for all
+        window rules, the single conditions are only checked if one of them matches
+    '''
+
+    def __init__(self):
+        self.any_active = None
+        self.results = {}
+
+    def is_active(self, condition):
+        '''returns the (cached) result of the window condition'''
+        if self.any_active is None:
+            self.any_active = getCondVisibility(" | ".join(WINDOW_CONDITIONS))
+        if not self.any_active:
+            return False
+        if condition not in self.results:
+            self.results[condition] = getCondVisibility(condition)
+        return self.results[condition]
+
+
+def get_content_type_facts(containerprefix=""):
+    '''read all facts we need to classify the content with a minimum of calls to kodi'''
+    if containerprefix:
+        facts = get_infolabels(LISTITEM_FACTS, containerprefix)
+    else:
+        facts = get_infolabels(CONTAINER_FACTS + LISTITEM_FACTS)
+    facts["windows"] = ActiveWindows()
+    return facts
+
+
+def get_current_content_type(containerprefix=""):
+    '''tries to determine the mediatype for the current listitem'''
+    return classify_content_type(get_content_type_facts(containerprefix), containerprefix)
@@ -0,0 +1,61 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+    script.skin.helper.service
+    Helper service and scripts for Kodi skins
+    epg_tracker.py
+    Reads the current and next broadcast of the playing tv channel from the epg
+'''
+
+import calendar
+import time
+from utils import kodi_json
+
+# seconds after the end of the broadcast to give kodi the time to switch to the next one
+EPG_MARGIN = 2
+# seconds before we check again when kodi didn't switch to the next broadcast yet
+EPG_RETRY = 10
+# we check at least this often (in seconds) in case the epg gets updated in the meantime
+MAX_WAKEUP = 900
+
+
+def parse_epg_time(value):
+    '''the epg times are utc in the format YYYY-MM-DD HH:MM:SS, returns the unix timestamp'''
+    return calendar.timegm(time.strptime(value, "%Y-%m-%d %H:%M:%S"))
+
+
+def get_genre(broadcast):
+    '''the genre of a broadcast like the VideoPlayer.Genre infolabel'''
+    genre = broadcast.get("genre", "")
+    if isinstance(genre, list):
+        genre = u" / ".join(genre)
+    return genre
+
+
+class EpgTracker(object):
+    '''tells when the current broadcast of the playing channel ends'''
+
+    @staticmethod
+    def get_channel_details():
+        '''returns the channel details with the current and next broadcast, empty if no channel is playing'''
+        for player in kodi_json("Player.GetActivePlayers"):
+            if player.get("type") == "video":
+                item = kodi_json("Player.GetItem", {"playerid": player["playerid"]}, "item")
+                if item.get("type") == "channel" and item.get("id"):
+                    return kodi_json("PVR.GetChannelDetails", {
+                        "channelid": item["id"],
+                        "properties": ["channel", "broadcastnow", "broadcastnext"]}, "channeldetails")
+        return {}
+
+    @staticmethod
+    def wakeup_delay(broadcast):
+        '''seconds untill the broadcast is over'''
+        try:
+            delay = parse_epg_time(broadcast["endtime"]) - time.time() + EPG_MARGIN
+        except (KeyError, ValueError):
+            return EPG_RETRY
+        if delay <= EPG_MARGIN:
+            # the broadcast should be over already, kodi didn't switch yet
+            return EPG_RETRY
+        return min(delay, MAX_WAKEUP)
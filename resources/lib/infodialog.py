@@ -12,7 +12,8 @@
 import xbmc
 import xbmcgui
 from metadatautils import MetadataUtils
-from utils import get_current_content_type, getCondVisibility
+from utils import getCondVisibility, get_infolabels
+from content_types import get_current_content_type
 
 CANCEL_DIALOG = (9, 10, 92, 216, 247, 257, 275, 61467, 61448, )
 ACTION_SHOW_INFO = (11, )
@@ -81,14 +82,15 @@ def get_cur_listitem(cont_prefix):
     if getCondVisibility("Window.IsActive(busydialog)"):
         xbmc.executebuiltin("Dialog.Close(busydialog)")
         xbmc.sleep(500)
-    dbid = xbmc.getInfoLabel("%sListItem.DBID" % cont_prefix).decode('utf-8')
+    values = get_infolabels(["DBID", "Property(DBID)", "DBTYPE", "Property(DBTYPE)"], "%sListItem." % cont_prefix)
+    dbid = values["DBID"]
     if not dbid or dbid == "-1":
-        dbid = xbmc.getInfoLabel("%sListItem.Property(DBID)" % cont_prefix).decode('utf-8')
+        dbid = values["Property(DBID)"]
         if dbid == "-1":
             dbid = ""
-    dbtype = xbmc.getInfoLabel("%sListItem.DBTYPE" % cont_prefix).decode('utf-8')
+    dbtype = values["DBTYPE"]
     if not dbtype:
-        dbtype = xbmc.getInfoLabel("%sListItem.Property(DBTYPE)" % cont_prefix).decode('utf-8')
+        dbtype = values["Property(DBTYPE)"]
     if not dbtype:
         dbtype = get_current_content_type(cont_prefix)
     return (dbid, dbtype)
@@ -0,0 +1,101 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+    script.skin.helper.service
+    Helper service and scripts for Kodi skins
+    invalidation_bus.py
+    Translates the library notifications of kodi into evictions of the cached items
+'''
+
+import threading
+from utils import kodi_json, log_msg, log_exception
+
+# the library of the notifications
+LIBRARIES = {"VideoLibrary": "video", "AudioLibrary": "music"}
+# the items of which the details depend on a parent item:
+# parent dbtype -> (json method, returntype, dbtype, the parent id is passed as filter)
+CHILDREN = {
+    "tvshow": [("VideoLibrary.GetSeasons", "seasons", "season", False),
+               ("VideoLibrary.GetEpisodes", "episodes", "episode", False)],
+    "album": [("AudioLibrary.GetSongs", "songs", "song", True)]
+}
+
+# the dbtypes of the library items
+LIBRARY_DBTYPES = {
+    "video": ["movie", "set", "tvshow", "season", "episode", "musicvideo"],
+    "music": ["artist", "album", "song"]
+}
+
+
+def get_library(dbtype, dbid):
+    '''returns the library of a listitem, empty if it's not a library item'''
+    if dbid and dbid != "-1":
+        for library, dbtypes in LIBRARY_DBTYPES.iteritems():
+            if dbtype in dbtypes:
+                return library
+    return ""
+
+
+class InvalidationBus(object):
+    '''
+        the caches subscribe with a callback func(library, dbtype, dbid), which is called for every
+        library item that changed or was removed. dbtype and dbid are None when the whole library
+        might have changed (e.g. after a library clean).
+    '''
+
+    def __init__(self):
+        self.subscribers = []
+        self.items = 0
+        self.flushes = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self, func):
+        '''register a callback for the invalidations'''
+        with self._lock:
+            self.subscribers.append(func)
+
+    def on_notification(self, method, mediatype="", dbid=0):
+        '''translate a kodi notification into the invalidations'''
+        namespace, _, event = method.partition(".")
+        library = LIBRARIES.get(namespace)
+        if not library:
+            return
+        if event in ["OnUpdate", "OnRemove"] and mediatype and dbid:
+            self.publish(library, mediatype, dbid)
+            if event == "OnUpdate":
+                # a removed parent can't be resolved anymore but then its children are never shown again
+                for child_type, child_id in self.get_children(mediatype, dbid):
+                    self.publish(library, child_type, child_id)
+        elif event == "OnCleanFinished":
+            self.publish(library)
+
+    def publish(self, library, dbtype=None, dbid=None):
+        '''notify all subscribers of the invalidation'''
+        if dbtype:
+            self.items += 1
+        else:
+            self.flushes += 1
+            log_msg("InvalidationBus - flush of the %s library" % library)
+        with self._lock:
+            subscribers = list(self.subscribers)
+        for func in subscribers:
+            try:
+                func(library, dbtype, dbid)
+            except Exception as exc:
+                log_exception(__name__, exc)
+
+    @staticmethod
+    def get_children(dbtype, dbid):
+        '''yields the dbtype and dbid of all items which belong to the given parent'''
+        parent = {"%sid" % dbtype: int(dbid)}
+        for method, returntype, child_type, as_filter in CHILDREN.get(dbtype, []):
+            for item in kodi_json(method, {"filter": parent} if as_filter else parent, returntype):
+                yield child_type, item["%sid" % child_type]
+
+    def stats(self):
+        '''return a dict with the counters'''
+        return {
+            "items": self.items,
+            "flushes": self.flushes
+        }
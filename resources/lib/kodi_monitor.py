@@ -7,141 +7,135 @@
     monitor all kodi events
 '''
 
-from utils import log_msg, json, prepare_win_props, log_exception, getCondVisibility
+from functools import partial
+from utils import log_msg, prepare_win_props, log_exception, getCondVisibility, get_infolabels, get_skin_int
+from window_props import WindowProperties
+from library_updater import LibraryUpdater
+from zapping import ZappingCoalescer
+from epg_tracker import EpgTracker, get_genre
+from player_prefetch import PlayerPrefetch, library_key, video_key, music_key
+from notification_queue import NotificationEvent, NotificationQueue, CATEGORY_PLAYER
+from scheduler import POOL_PLAYER
 import xbmc
 
 
 class KodiMonitor(xbmc.Monitor):
     '''Monitor all events in Kodi'''
-    all_window_props = []
     monitoring_stream = False
+    stream_title = ""
     infopanelshown = False
-    bgtasks = 0
+    epg_tracking = False
 
     def __init__(self, **kwargs):
         xbmc.Monitor.__init__(self)
         self.metadatautils = kwargs.get("metadatautils")
         self.win = kwargs.get("win")
-        self.enable_animatedart = getCondVisibility("Skin.HasSetting(SkinHelper.EnableAnimatedPosters)") == 1
+        self.library_stats = kwargs.get("library_stats")
+        self.metrics = kwargs.get("metrics")
+        self.scheduler = kwargs.get("scheduler")
+        self.manifest = kwargs.get("manifest")
+        self.invalidation = kwargs.get("invalidation")
+        self.channel_index = kwargs.get("channel_index")
+        self.win_props = WindowProperties(self.win)
+        self.metrics.gauge("player.windowprops", self.win_props.stats)
+        # kodi's callback thread only queues the notifications, dedicated workers process them
+        self.notifications = NotificationQueue(self.process_notification, self.metrics)
+        self.notifications.start()
+        self.library_updater = LibraryUpdater(self.metadatautils, self.scheduler, self.metrics, self)
+        self.player_prefetch = PlayerPrefetch(self.metrics)
+        self.invalidation.subscribe(self.player_prefetch.invalidate)
+        self.epg_tracker = EpgTracker()
+        # rapid channel changes are coalesced, the logos are served from the channel index meanwhile
+        self.zapping = ZappingCoalescer(self.scheduler, self.metrics)
 
     def onNotification(self, sender, method, data):
-        '''builtin function for the xbmc.Monitor class'''
+        '''builtin function for the xbmc.Monitor class, the event is processed by the notification queue'''
         try:
             log_msg("Kodi_Monitor: sender %s - method: %s  - data: %s" % (sender, method, data))
-            data = json.loads(data.decode('utf-8'))
-            mediatype = ""
-            dbid = 0
-            transaction = False
-            if data and isinstance(data, dict):
-                if data.get("item"):
-                    mediatype = data["item"].get("type", "")
-                    dbid = data["item"].get("id", 0)
-                elif data.get("type"):
-                    mediatype = data["type"]
-                    dbid = data.get("id", 0)
-                if data.get("transaction"):
-                    transaction = True
-
-            if method == "System.OnQuit":
-                self.win.setProperty("SkinHelperShutdownRequested", "shutdown")
-
-            if method == "VideoLibrary.OnUpdate":
-                self.process_db_update(mediatype, dbid, transaction)
-
-            if method == "AudioLibrary.OnUpdate":
-                self.process_db_update(mediatype, dbid, transaction)
-
-            if method == "Player.OnStop":
-                self.monitoring_stream = False
-                self.infopanelshown = False
-                self.win.clearProperty("Skinhelper.PlayerPlaying")
-                self.win.clearProperty("TrailerPlaying")
-                self.reset_win_props()
+            self.notifications.put(NotificationEvent.parse(sender, method, data))
+        except Exception as exc:
+            log_exception(__name__, exc)
 
-            if method == "Player.OnPlay":
-                if not self.monitoring_stream and not getCondVisibility("Player.DisplayAfterSeek"):
-                    self.reset_win_props()
-                if self.wait_for_player():
-                    if getCondVisibility("Player.HasAudio"):
-                        if getCondVisibility("Player.IsInternetStream"):
-                            self.monitor_radiostream()
-                        else:
-                            self.set_music_properties()
-                    if getCondVisibility("Pvr.IsPlayingRadio"):
-                        if getCondVisibility("!Player.IsInternetStream"):
-                            self.monitor_radiostream()
-                        else:
+    def close(self):
+        '''stop processing the notifications'''
+        self.notifications.stop()
+
+    def process_notification(self, event):
+        '''handle a kodi notification, runs on the worker of the notification queue'''
+        method = event.method
+        mediatype = event.mediatype
+        dbid = event.dbid
+
+        # the totals are recomputed by the listitem monitor
+        if self.library_stats:
+            self.library_stats.on_notification(method, mediatype)
+        # evict the changed library items from the caches
+        self.invalidation.on_notification(method, mediatype, dbid)
+
+        if method == "System.OnQuit":
+            self.win.setProperty("SkinHelperShutdownRequested", "shutdown")
+
+        # precache/refresh the updated items in batches
+        self.library_updater.on_notification(method, mediatype, dbid, event.transaction)
+
+        if method == "Player.OnStop":
+            # abandon the work for the channel we're leaving
+            self.zapping.next_generation()
+            self.monitoring_stream = False
+            self.epg_tracking = False
+            self.infopanelshown = False
+            self.win.clearProperty("Skinhelper.PlayerPlaying")
+            self.win.clearProperty("TrailerPlaying")
+            self.reset_win_props()
+
+        if method == "Player.OnPlay" and mediatype == "channel" and not event.settled:
+            # channel surfing: only the logo is shown right away, the rest waits untill the channel is watched
+            self.set_channellogo(self.channel_index.get_logo(dbid))
+            event.settled = True
+            self.zapping.defer(partial(self.notifications.put, event))
+
+        elif method == "Player.OnPlay":
+            if mediatype != "channel":
+                self.zapping.next_generation()
+            if not self.monitoring_stream and not getCondVisibility("Player.DisplayAfterSeek"):
+                self.reset_win_props()
+            if self.wait_for_player():
+                if getCondVisibility("Player.HasAudio"):
+                    if getCondVisibility("Player.IsInternetStream"):
+                        self.monitor_radiostream()
+                    else:
+                        with self.metrics.span("player.music"):
                             self.set_music_properties()
-                    elif getCondVisibility("VideoPlayer.Content(livetv) | String.StartsWith(Player.FileNameAndPath,pvr://)"):
-                        self.monitor_livetv()
+                        self.schedule_prefetch()
+                if getCondVisibility("Pvr.IsPlayingRadio"):
+                    if getCondVisibility("!Player.IsInternetStream"):
+                        self.monitor_radiostream()
                     else:
+                        with self.metrics.span("player.music"):
+                            self.set_music_properties()
+                elif getCondVisibility("VideoPlayer.Content(livetv) | String.StartsWith(Player.FileNameAndPath,pvr://)"):
+                    self.monitor_livetv()
+                else:
+                    with self.metrics.span("player.video"):
                         self.set_video_properties(mediatype, dbid)
-                        self.show_info_panel()
-        except Exception as exc:
-            log_exception(__name__, exc)
-
-    def process_db_update(self, media_type, dbid, transaction=False):
-        '''precache/refresh items when a kodi db item gets updated/added'''
-
-        self.bgtasks += 1
-
-        # item specific actions
-        if dbid and media_type == "movie" and transaction and self.enable_animatedart:
-            movie = self.metadatautils.kodidb.movie(dbid)
-            imdb_id = movie["imdbnumber"]
-            if not imdb_id and "uniqueid" in movie:
-                for value in movie["uniqueid"]:
-                    if value.startswith("tt"):
-                        imdb_id = value
-            if imdb_id and self.bgtasks < 2:
-                self.metadatautils.get_animated_artwork(imdb_id)
-
-        if dbid and media_type in ["movie", "episode", "musicvideo"]:
-            self.metadatautils.get_streamdetails(dbid, media_type, ignore_cache=True)
-            if transaction and self.bgtasks < 2:
-                self.artwork_downloader(media_type, dbid)
-
-        # for music content we only flush the cache
-        if dbid and (not transaction or self.bgtasks < 2):
-            if media_type == "song":
-                song = self.metadatautils.kodidb.song(dbid)
-                if song:
-                    self.metadatautils.get_music_artwork(
-                        song["artist"][0], song["album"], song["title"], str(
-                            song["disc"]), ignore_cache=True, flush_cache=True)
-            elif media_type == "album":
-                album = self.metadatautils.kodidb.album(dbid)
-                if album:
-                    self.metadatautils.get_music_artwork(
-                        album["artist"][0],
-                        album["title"],
-                        ignore_cache=True, flush_cache=True)
-            elif media_type == "artist":
-                artist = self.metadatautils.kodidb.artist(dbid)
-                if artist:
-                    self.metadatautils.get_music_artwork(artist["artist"], ignore_cache=True, flush_cache=True)
-
-        # remove task
-        self.bgtasks -= 1
+                    self.schedule_prefetch()
+                    self.show_info_panel()
 
     def reset_win_props(self):
         '''reset all window props set by the script...'''
-        self.metadatautils.process_method_on_list(self.win.clearProperty, self.all_window_props)
-        self.all_window_props = []
+        self.win_props.clear()
 
-    def set_win_prop(self, prop_tuple):
-        '''set window property from key/value tuple'''
-        if prop_tuple[1] and not prop_tuple[0] in self.all_window_props:
-            self.all_window_props.append(prop_tuple[0])
-            self.win.setProperty(prop_tuple[0], prop_tuple[1])
+    def set_win_props(self, prop_tuples):
+        '''set window properties from key/value tuples, properties which are already set are kept'''
+        self.win_props.add_props(prop_tuples)
 
-    @staticmethod
-    def wait_for_player():
+    def wait_for_player(self):
         '''wait for player untill it's actually playing content'''
         count = 0
         while not getCondVisibility("Player.HasVideo | Player.HasAudio"):
             xbmc.sleep(100)
-            if count == 50:
+            # give up when the wait is superseded by a newer player event
+            if count == 50 or self.abortRequested() or self.notifications.pending(CATEGORY_PLAYER):
                 return False
             count += 1
         return True
@@ -164,9 +158,13 @@ class KodiMonitor(xbmc.Monitor):
                         xbmc.executebuiltin('Action(info)')
                     retries += 1
                 # close info again after given amount of time
-                xbmc.Monitor().waitForAbort(sec_to_display)
-                if getCondVisibility("Player.ShowInfo + Window.IsActive(fullscreenvideo)"):
-                    xbmc.executebuiltin('Action(info)')
+                self.scheduler.schedule("player.infopanel", self.close_info_panel, delay=sec_to_display, repeat=False)
+
+    @staticmethod
+    def close_info_panel():
+        '''close the OSD infopanel which was auto shown at playback start'''
+        if getCondVisibility("Player.ShowInfo + Window.IsActive(fullscreenvideo)"):
+            xbmc.executebuiltin('Action(info)')
 
     def set_video_properties(self, mediatype, li_dbid):
         '''sets the window props for a playing video item'''
@@ -174,42 +172,72 @@ class KodiMonitor(xbmc.Monitor):
             mediatype = self.get_mediatype()
         details = self.get_player_infolabels()
         li_title = details["title"]
-        li_year = details["year"]
-        li_imdb = details["imdbnumber"]
-        li_showtitle = details["tvshowtitle"]
+        # the properties might be prefetched while the previous playlist item was playing
+        if li_dbid:
+            all_props = self.player_prefetch.get(library_key(mediatype, li_dbid))
+        else:
+            all_props = self.player_prefetch.get(video_key(li_title, details["year"], details["tvshowtitle"]))
+        if all_props is None:
+            all_props = self.get_video_properties(
+                mediatype, li_dbid, li_title, details["year"], details["imdbnumber"], details["tvshowtitle"])
+        if li_title == xbmc.getInfoLabel("Player.Title").decode('utf-8'):
+            self.set_win_props(all_props)
+
+    def get_video_properties(self, mediatype, li_dbid, li_title, li_year, li_imdb, li_showtitle):
+        '''collect the window props for a video item'''
         details = {"art": {}}
 
         # video content
         if mediatype in ["movie", "episode", "musicvideo"]:
+            timed = self.timed_provider
+            # the providers of property groups the skin doesn't use are skipped
+            uses = self.manifest.uses
+            extendedart = getCondVisibility("Skin.HasSetting(SkinHelper.EnableExtendedArt)") and uses("extendedart")
 
             # get imdb_id
-            li_imdb, li_tvdb = self.metadatautils.get_imdbtvdb_id(li_title, mediatype, li_year, li_imdb, li_showtitle)
+            li_tvdb = ""
+            if uses("omdb", "top250", "tvdb", "tmdb", "animatedart", "extendedart"):
+                li_imdb, li_tvdb = timed("imdbtvdb", self.metadatautils.get_imdbtvdb_id)(
+                    li_title, mediatype, li_year, li_imdb, li_showtitle)
 
             # generic video properties (studio, streamdetails, omdb, top250)
-            details = self.metadatautils.extend_dict(details, self.metadatautils.get_omdb_info(li_imdb))
-            if li_dbid:
-                details = self.metadatautils.extend_dict(details, self.metadatautils.get_streamdetails(li_dbid, mediatype))
-            details = self.metadatautils.extend_dict(details, self.metadatautils.get_top250_rating(li_imdb))
+            if uses("omdb") or extendedart:
+                details = self.metadatautils.extend_dict(
+                    details, timed("omdb", self.metadatautils.get_omdb_info)(li_imdb))
+            if li_dbid and uses("streamdetails"):
+                details = self.metadatautils.extend_dict(
+                    details, timed("streamdetails", self.metadatautils.get_streamdetails)(li_dbid, mediatype))
+            if uses("top250"):
+                details = self.metadatautils.extend_dict(
+                    details, timed("top250", self.metadatautils.get_top250_rating)(li_imdb))
 
             # tvshows-only properties (tvdb)
-            if mediatype == "episode":
-                details = self.metadatautils.extend_dict(details, self.metadatautils.get_tvdb_details(li_imdb, li_tvdb))
+            if mediatype == "episode" and uses("tvdb"):
+                details = self.metadatautils.extend_dict(
+                    details, timed("tvdb", self.metadatautils.get_tvdb_details)(li_imdb, li_tvdb))
 
             # movies-only properties (tmdb, animated art)
             if mediatype == "movie":
-                details = self.metadatautils.extend_dict(details, self.metadatautils.get_tmdb_details(li_imdb))
-                if li_imdb and getCondVisibility("Skin.HasSetting(SkinHelper.EnableAnimatedPosters)"):
-                    details = self.metadatautils.extend_dict(details, self.metadatautils.get_animated_artwork(li_imdb))
+                if uses("tmdb") or extendedart:
+                    details = self.metadatautils.extend_dict(
+                        details, timed("tmdb", self.metadatautils.get_tmdb_details)(li_imdb))
+                if li_imdb and uses("animatedart") and getCondVisibility(
+                        "Skin.HasSetting(SkinHelper.EnableAnimatedPosters)"):
+                    details = self.metadatautils.extend_dict(
+                        details, timed("animatedart", self.metadatautils.get_animated_artwork)(li_imdb))
 
             # extended art
-            if getCondVisibility("Skin.HasSetting(SkinHelper.EnableExtendedArt)"):
+            if extendedart:
                 tmdbid = details.get("tmdb_id", "")
-                details = self.metadatautils.extend_dict(details, self.metadatautils.get_extended_artwork(
-                    li_imdb, li_tvdb, tmdbid, mediatype))
+                details = self.metadatautils.extend_dict(
+                    details, timed("extendedart", self.metadatautils.get_extended_artwork)(
+                        li_imdb, li_tvdb, tmdbid, mediatype))
 
-        if li_title == xbmc.getInfoLabel("Player.Title").decode('utf-8'):
-            all_props = prepare_win_props(details, u"SkinHelper.Player.")
-            self.metadatautils.process_method_on_list(self.set_win_prop, all_props)
+        return prepare_win_props(details, u"SkinHelper.Player.")
+
+    def timed_provider(self, name, func):
+        '''wrap a metadata provider of the player properties to collect its timing'''
+        return self.metrics.timed("player.%s" % name, func)
 
     def set_music_properties(self):
         '''sets the window props for a playing song'''
@@ -236,25 +264,62 @@ class KodiMonitor(xbmc.Monitor):
                     li_title = li_title.split(splitchar)[1].strip()
                     break
 
+        # the properties might be prefetched while the previous playlist item was playing
+        all_props = self.player_prefetch.get(music_key(li_artist, li_album, li_title))
+        if all_props is None:
+            all_props = self.get_music_properties(li_artist, li_album, li_title, li_disc, li_plot)
+        if all_props and li_title_org == xbmc.getInfoLabel("MusicPlayer.Title").decode('utf-8'):
+            self.set_win_props(all_props)
+
+    def get_music_properties(self, li_artist, li_album, li_title, li_disc, li_plot):
+        '''collect the window props for a song'''
+        all_props = []
         if getCondVisibility("Skin.HasSetting(SkinHelper.EnableMusicArt)") and li_artist and(
-                li_title or li_album):
-            result = self.metadatautils.get_music_artwork(li_artist, li_album, li_title, li_disc)
+                li_title or li_album) and self.manifest.uses("musicart"):
+            with self.metrics.span("player.musicart"):
+                result = self.metadatautils.get_music_artwork(li_artist, li_album, li_title, li_disc)
             if result.get("extendedplot") and li_plot:
                 li_plot = li_plot.replace('\n', ' ').replace('\r', '').rstrip()
                 result["extendedplot"] = "%s -- %s" % (result["extendedplot"], li_plot)
             all_props = prepare_win_props(result, u"SkinHelper.Player.")
-            if li_title_org == xbmc.getInfoLabel("MusicPlayer.Title").decode('utf-8'):
-                self.metadatautils.process_method_on_list(self.set_win_prop, all_props)
-
-    def artwork_downloader(self, media_type, dbid):
-        '''trigger artwork scan with artwork downloader if enabled'''
-        if getCondVisibility(
-                "System.HasAddon(script.artwork.downloader) + Skin.HasSetting(EnableArtworkDownloader)"):
-            if media_type == "episode":
-                media_type = "tvshow"
-                dbid = self.metadatautils.kodidb.episode(dbid)["tvshowid"]
-            xbmc.executebuiltin(
-                "RunScript(script.artwork.downloader,silent=true,mediatype=%s,dbid=%s)" % (media_type, dbid))
+        return all_props
+
+    def schedule_prefetch(self):
+        '''prefetch the properties of the next playlist items once the current item is handled'''
+        self.scheduler.schedule("player.prefetch", self.prefetch_upcoming, delay=2, repeat=False, background=True)
+
+    def prefetch_upcoming(self):
+        '''compute the window props of the next items in the playlist'''
+        playlist, items = self.player_prefetch.get_upcoming(get_skin_int("SkinHelper.PlayerPrefetch", 2))
+        for item in items:
+            if self.abortRequested() or not getCondVisibility("Player.HasMedia"):
+                return
+            title = item.get("title") or item.get("label", "")
+            mediatype = item.get("type", "")
+            library = playlist
+            if playlist == "music":
+                artist = u" / ".join(item.get("artist", []))
+                album = item.get("album", "")
+                keys = [music_key(artist, album, title)]
+                if self.player_prefetch.cache.get(keys[0], count=False) is not None:
+                    continue
+                with self.metrics.span("player.prefetch.compute"):
+                    all_props = self.get_music_properties(
+                        artist, album, title, u"%s" % item["disc"] if item.get("disc") else "", item.get("comment", ""))
+            elif mediatype in ["movie", "episode", "musicvideo"]:
+                year = u"%s" % item["year"] if item.get("year") else ""
+                keys = [video_key(title, year, item.get("showtitle", ""))]
+                if item.get("id"):
+                    keys.append(library_key(mediatype, item["id"]))
+                if self.player_prefetch.cache.get(keys[0], count=False) is not None:
+                    continue
+                with self.metrics.span("player.prefetch.compute"):
+                    all_props = self.get_video_properties(
+                        mediatype, item.get("id", 0), title, year, item.get("imdbnumber", ""),
+                        item.get("showtitle", ""))
+            else:
+                continue
+            self.player_prefetch.set(keys, all_props, library, mediatype, item.get("id", 0))
 
     def monitor_radiostream(self):
         '''
@@ -264,49 +329,107 @@ class KodiMonitor(xbmc.Monitor):
         if self.monitoring_stream:
             # another monitoring already in progress...
             return
-        last_title = ""
-        while not self.abortRequested() and getCondVisibility("Player.HasAudio"):
-            self.monitoring_stream = True
-            cur_title = xbmc.getInfoLabel("MusicPlayer.Title").decode('utf-8')
-            if cur_title != last_title:
-                last_title = cur_title
-                self.reset_win_props()
-                self.set_music_properties()
-            self.waitForAbort(2)
-        self.monitoring_stream = False
+        self.monitoring_stream = True
+        self.stream_title = ""
+        self.scheduler.schedule("player.stream", self.poll_radiostream, interval=2, delay=0, background=True,
+                                pool=POOL_PLAYER)
+
+    def poll_radiostream(self):
+        '''check if the track of the radiostream changed, returns False when the monitoring has to stop'''
+        if not self.monitoring_stream or self.abortRequested() or not getCondVisibility("Player.HasAudio"):
+            self.monitoring_stream = False
+            return False
+        cur_title = xbmc.getInfoLabel("MusicPlayer.Title").decode('utf-8')
+        if cur_title != self.stream_title:
+            self.stream_title = cur_title
+            self.reset_win_props()
+            self.set_music_properties()
+        return True
 
     def monitor_livetv(self):
         '''
-            for livetv we are not notified when the program changes
-            so we have to monitor that ourself
+            for livetv we are not notified when the program changes, the epg tells us when the current
+            program ends so we only wake up at that moment. Without epg we monitor the title ourself.
         '''
         if self.monitoring_stream:
-            # another monitoring already in progress...
+            # another monitoring already in progress, the channel might have changed
+            if self.epg_tracking:
+                self.scheduler.schedule("player.stream", self.track_livetv, delay=0, repeat=False, background=True,
+                                        pool=POOL_PLAYER)
             return
-        last_title = ""
-        while not self.abortRequested() and getCondVisibility("Player.HasVideo"):
-            self.monitoring_stream = True
-            li_title = xbmc.getInfoLabel("Player.Title").decode('utf-8')
-            if li_title and li_title != last_title:
-                all_props = []
-                last_title = li_title
-                self.reset_win_props()
-                li_channel = xbmc.getInfoLabel("VideoPlayer.ChannelName").decode('utf-8')
-                # pvr artwork
-                if getCondVisibility("Skin.HasSetting(SkinHelper.EnablePVRThumbs)"):
+        self.monitoring_stream = True
+        self.stream_title = ""
+        self.scheduler.schedule("player.stream", self.track_livetv, delay=0, repeat=False, background=True,
+                                pool=POOL_PLAYER)
+
+    def track_livetv(self):
+        '''update the livetv properties and schedule the next update at the end of the current program'''
+        generation = self.zapping.generation
+        if not self.poll_livetv():
+            return
+        channel = self.epg_tracker.get_channel_details()
+        if not channel.get("broadcastnow"):
+            # no epg for this channel, fallback to polling the title
+            self.epg_tracking = False
+            self.scheduler.schedule("player.stream", self.poll_livetv, interval=2, delay=2, background=True,
+                                    pool=POOL_PLAYER)
+            return
+        self.epg_tracking = True
+        self.scheduler.schedule("player.stream", self.track_livetv, repeat=False, background=True, pool=POOL_PLAYER,
+                                delay=self.epg_tracker.wakeup_delay(channel["broadcastnow"]))
+        # prefetch the artwork of the next program so it's ready when the program changes
+        upcoming = channel.get("broadcastnext")
+        if upcoming and upcoming.get("title") and self.use_pvrart() and self.zapping.is_current(generation):
+            li_channel = channel.get("channel") or channel.get("label", "")
+            if self.channel_index.get_artwork(upcoming["title"], li_channel) is None:
+                with self.metrics.span("livetv.prefetch"):
+                    pvrart = self.metadatautils.get_pvr_artwork(upcoming["title"], li_channel, get_genre(upcoming))
+                self.channel_index.set_artwork(upcoming["title"], li_channel, pvrart)
+
+    def poll_livetv(self):
+        '''check if the program of the livetv channel changed, returns False when the monitoring has to stop'''
+        if not self.monitoring_stream or self.abortRequested() or not getCondVisibility("Player.HasVideo"):
+            self.monitoring_stream = False
+            self.epg_tracking = False
+            return False
+        generation = self.zapping.generation
+        li_title = xbmc.getInfoLabel("Player.Title").decode('utf-8')
+        if li_title and li_title != self.stream_title:
+            self.stream_title = li_title
+            self.reset_win_props()
+            li_channel = xbmc.getInfoLabel("VideoPlayer.ChannelName").decode('utf-8')
+            # pvr channellogo, kodi's own logos are served from the channel index
+            if self.manifest.uses("channellogo"):
+                channellogo = self.channel_index.get_logo(channelname=li_channel)
+                if not channellogo:
+                    with self.metrics.span("livetv.channellogo"):
+                        channellogo = self.metadatautils.get_channellogo(li_channel)
+                self.set_channellogo(channellogo)
+            # pvr artwork, might be prefetched already
+            if self.use_pvrart():
+                pvrart = self.channel_index.get_artwork(li_title, li_channel)
+                if pvrart is None:
                     li_genre = xbmc.getInfoLabel("VideoPlayer.Genre").decode('utf-8')
-                    pvrart = self.metadatautils.get_pvr_artwork(li_title, li_channel, li_genre)
-                    all_props = prepare_win_props(pvrart, u"SkinHelper.Player.")
-                # pvr channellogo
-                channellogo = self.metadatautils.get_channellogo(li_channel)
-                all_props.append(("SkinHelper.Player.ChannelLogo", channellogo))
-                all_props.append(("SkinHelper.Player.Art.ChannelLogo", channellogo))
-                if last_title == li_title:
-                    self.metadatautils.process_method_on_list(self.set_win_prop, all_props)
-                # show infopanel if needed
-                self.show_info_panel()
-            self.waitForAbort(2)
-        self.monitoring_stream = False
+                    with self.metrics.span("livetv.pvrart"):
+                        pvrart = self.metadatautils.get_pvr_artwork(li_title, li_channel, li_genre)
+                # the program or channel might have changed during the lookup
+                if self.stream_title == li_title and self.zapping.is_current(generation):
+                    with self.metrics.span("livetv.winprops"):
+                        self.set_win_props(prepare_win_props(pvrart, u"SkinHelper.Player."))
+            # show infopanel if needed
+            self.show_info_panel()
+        return True
+
+    def set_channellogo(self, channellogo):
+        '''set the channellogo window props, the logo of the previous channel is replaced or cleared'''
+        if not self.manifest.uses("channellogo"):
+            channellogo = ""
+        for key in ["SkinHelper.Player.ChannelLogo", "SkinHelper.Player.Art.ChannelLogo"]:
+            self.win_props.set_prop(key, channellogo or "")
+
+    def use_pvrart(self):
+        '''the skin wants the pvr artwork for the player'''
+        return self.manifest.uses("pvrart") and getCondVisibility("Skin.HasSetting(SkinHelper.EnablePVRThumbs)")
 
     @staticmethod
     def get_mediatype():
@@ -330,16 +453,18 @@ class KodiMonitor(xbmc.Monitor):
                  "artist", "album", "rating", "albumartist", "discnumber",
                  "firstaired", "mpaa", "tagline", "rating", "imdbnumber"
                  ]
-        for prop in props:
-            propvalue = xbmc.getInfoLabel('VideoPlayer.%s' % prop).decode('utf-8')
-            details[prop] = propvalue
         # art properties
-        props = ["fanart", "poster", "clearlogo", "clearart", "landscape",
-                 "characterart", "thumb", "banner", "discart", "tvshow.landscape",
-                 "tvshow.clearlogo", "tvshow.poster", "tvshow.fanart", "tvshow.banner"
-                 ]
+        artprops = ["fanart", "poster", "clearlogo", "clearart", "landscape",
+                    "characterart", "thumb", "banner", "discart", "tvshow.landscape",
+                    "tvshow.clearlogo", "tvshow.poster", "tvshow.fanart", "tvshow.banner"
+                    ]
+        # read all infolabels at once
+        values = get_infolabels(["VideoPlayer.%s" % prop for prop in props] +
+                                ["Player.Art(%s)" % prop for prop in artprops])
         for prop in props:
-            propvalue = xbmc.getInfoLabel('Player.Art(%s)' % prop).decode('utf-8')
+            details[prop] = values["VideoPlayer.%s" % prop]
+        for prop in artprops:
+            propvalue = values["Player.Art(%s)" % prop]
             if propvalue:
                 prop = prop.replace("tvshow.", "")
                 propvalue = self.metadatautils.get_clean_image(propvalue)
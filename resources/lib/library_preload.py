@@ -0,0 +1,188 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+    script.skin.helper.service
+    Helper service and scripts for Kodi skins
+    library_preload.py
+    Bulk preload of the details of all items in a library folder with paged json queries
+'''
+
+import re
+import time
+from utils import kodi_json, log_msg, KODI_VERSION
+import xbmc
+from lru_cache import LRUCache
+
+# number of items to retrieve with a single json query
+PAGE_SIZE = 250
+
+VIDEO_PROPS = ["title", "genre", "year", "rating", "plot", "file", "thumbnail", "art"]
+if KODI_VERSION > 16:
+    VIDEO_PROPS.append("uniqueid")
+
+# library folders we can preload: (folderpath regex, json method, returntype, dbtype, properties)
+LIBRARY_NODES = [
+    (r"^videodb://movies/titles/", "VideoLibrary.GetMovies", "movies", "movie",
+     VIDEO_PROPS + ["director", "writer", "studio", "plotoutline", "tagline", "runtime", "premiered", "imdbnumber",
+                    "streamdetails"]),
+    (r"^videodb://tvshows/titles/(?:\?.*)?$", "VideoLibrary.GetTVShows", "tvshows", "tvshow",
+     VIDEO_PROPS + ["studio", "premiered", "imdbnumber"]),
+    (r"^videodb://tvshows/titles/(?P<tvshowid>\d+)/(?P<season>-?\d+)/", "VideoLibrary.GetEpisodes", "episodes",
+     "episode", VIDEO_PROPS + ["showtitle", "season", "episode", "firstaired", "director", "writer", "runtime",
+                               "streamdetails"]),
+    (r"^videodb://musicvideos/titles/", "VideoLibrary.GetMusicVideos", "musicvideos", "musicvideo",
+     VIDEO_PROPS + ["artist", "album", "director", "studio", "runtime", "streamdetails"]),
+    (r"^musicdb://albums/(?:\?.*)?$", "AudioLibrary.GetAlbums", "albums", "album",
+     ["title", "artist", "genre", "year", "rating", "thumbnail", "art"]),
+    (r"^musicdb://songs/(?:\?.*)?$", "AudioLibrary.GetSongs", "songs", "song",
+     ["title", "artist", "album", "albumartist", "disc", "duration", "genre", "year", "rating", "file",
+      "thumbnail", "art"])
+]
+# the names of the audio codecs and channel layouts, like metadatautils.get_streamdetails
+AUDIO_CODECS = [("ac3", u"Dolby D"), ("dca", u"DTS"), ("dts-hd", u"DTS HD"), ("dtshd", u"DTS HD")]
+AUDIO_CHANNELS = {1: u"1.0", 2: u"2.0", 3: u"2.1", 4: u"4.0", 5: u"5.0", 6: u"5.1", 7: u"6.1", 8: u"7.1",
+                  9: u"8.1", 10: u"9.1"}
+
+
+def format_streamdetails(streamdetails):
+    '''format the streamdetails of a json library item like metadatautils.get_streamdetails'''
+    details = {}
+    all_audio = []
+    all_languages = []
+    for count, stream in enumerate(streamdetails.get("audio", [])):
+        codec = stream.get("codec", "")
+        for name, label in AUDIO_CODECS:
+            if name in codec:
+                codec = label
+                break
+        channels = AUDIO_CHANNELS.get(stream.get("channels"), u"%s" % stream.get("channels", ""))
+        language = stream.get("language", "")
+        if language and language not in all_languages:
+            all_languages.append(language)
+        if language:
+            details["AudioStreams.%d" % count] = u"%s - %s - %s" % (language, codec, channels)
+        else:
+            details["AudioStreams.%d" % count] = u"%s - %s" % (codec, channels)
+        all_audio.append(details["AudioStreams.%d" % count])
+    all_subtitles = []
+    for stream in streamdetails.get("subtitle", []):
+        language = stream.get("language", "")
+        if language and language not in all_subtitles:
+            details["SubtitleStreams.%d" % len(all_subtitles)] = language
+            all_subtitles.append(language)
+    details["subtitles"] = all_subtitles
+    details["audiostreams"] = all_audio
+    details["languages"] = all_languages
+    if streamdetails.get("video"):
+        details["videoheight"] = streamdetails["video"][0].get("height", 0)
+        details["videowidth"] = streamdetails["video"][0].get("width", 0)
+    return details
+
+
+class LibraryPreload(object):
+    '''preloads the listitem infolabels of library items in bulk so they don't have to be read one by one'''
+
+    def __init__(self, metadatautils):
+        self.metadatautils = metadatautils
+        self.cache = LRUCache(max_items=5000, max_bytes=16 * 1024 * 1024, ttl=1800)
+        self.folder = ""
+        self.date_format = ""
+
+    @staticmethod
+    def get_library_node(folderpath):
+        '''returns the query details if the folder is a library node we can preload'''
+        for node in LIBRARY_NODES:
+            match = re.match(node[0], folderpath)
+            if match:
+                params = {}
+                if match.groupdict().get("tvshowid"):
+                    params["tvshowid"] = int(match.group("tvshowid"))
+                    if match.group("season") != "-1":
+                        params["season"] = int(match.group("season"))
+                return node[1:], params
+        return None
+
+    def preload(self, folderpath, cancelled):
+        '''retrieve all items of the library folder in pages and fill the cache'''
+        node = self.get_library_node(folderpath)
+        if not node or folderpath == self.folder:
+            return
+        (method, returntype, dbtype, properties), params = node
+        params["properties"] = properties
+        # the listitem shows the dates in the short date format of the region
+        self.date_format = xbmc.getRegion("dateshort")
+        start = 0
+        while not cancelled():
+            params["limits"] = {"start": start, "end": start + PAGE_SIZE}
+            items = kodi_json(method, params, returntype)
+            for item in items:
+                self.cache.set(u"%s.%s" % (dbtype, item["%sid" % dbtype]), self.get_infolabels(item, dbtype))
+            start += len(items)
+            if len(items) < PAGE_SIZE or start >= self.cache.max_items:
+                # only a completely loaded folder counts as preloaded, a cancelled one is loaded again
+                self.folder = folderpath
+                log_msg("LibraryPreload - preloaded %s items for %s" % (start, folderpath))
+                break
+
+    def get(self, dbtype, dbid):
+        '''get the preloaded infolabels for the given library item'''
+        return self.cache.get(u"%s.%s" % (dbtype, dbid))
+
+    def get_streamdetails(self, dbtype, dbid):
+        '''get the preloaded streamdetails, None if the item was not preloaded with its streamdetails'''
+        values = self.get(dbtype, dbid)
+        return values.get("streamdetails") if values else None
+
+    def invalidate(self, dbtype, dbid):
+        '''drop the preloaded infolabels of a changed library item'''
+        self.cache.pop(u"%s.%s" % (dbtype, dbid))
+
+    def clear(self):
+        '''drop all preloaded items, the current folder is preloaded again when it's revisited'''
+        self.cache.clear()
+        self.folder = ""
+
+    def format_date(self, value):
+        '''the json dates are YYYY-MM-DD, the listitem uses the localized format'''
+        try:
+            return time.strftime(self.date_format, time.strptime(value, "%Y-%m-%d")).decode("utf-8")
+        except ValueError:
+            return ""
+
+    def get_infolabels(self, item, dbtype):
+        '''translate a json library item to the values of the corresponding listitem infolabels'''
+        values = {}
+        for key in ["label", "title", "plot", "plotoutline", "tagline", "album"]:
+            values[key] = item.get(key, "")
+        for key in ["premiered", "firstaired"]:
+            values[key] = self.format_date(item[key]) if item.get(key) else ""
+        for key in ["genre", "director", "writer", "studio", "artist", "albumartist"]:
+            values[key] = u" / ".join(item.get(key, []))
+        for key in ["year", "season", "episode"]:
+            values[key] = u"%s" % item[key] if item.get(key, -1) > 0 else ""
+        values["tvshowtitle"] = item.get("showtitle", "")
+        values["discnumber"] = u"%s" % item["disc"] if item.get("disc") else ""
+        values["rating"] = u"%.1f" % item["rating"] if item.get("rating") else ""
+        values["thumb"] = values["icon"] = self.metadatautils.get_clean_image(item.get("thumbnail", ""))
+        values["imdbnumber"] = item.get("imdbnumber", "") or item.get("uniqueid", {}).get("imdb", "")
+        # video runtime is in seconds, the listitem shows minutes
+        if item.get("runtime"):
+            values["duration"] = u"%s" % (item["runtime"] / 60)
+        elif item.get("duration"):
+            values["duration"] = u"%s:%02d" % (item["duration"] / 60, item["duration"] % 60)
+        # folder items have a library path, files their own path
+        if dbtype in ["tvshow", "album"]:
+            values["filenameandpath"] = u"%s://%ss/titles/%s/" % (
+                "videodb" if dbtype == "tvshow" else "musicdb", dbtype, item["%sid" % dbtype])
+            values["path"] = item.get("file", "") or values["filenameandpath"]
+        else:
+            values["filenameandpath"] = item.get("file", "")
+            values["path"] = re.sub(r"[^/\\]*$", "", values["filenameandpath"])
+        values["folderpath"] = values["path"]
+        if "streamdetails" in item:
+            values["streamdetails"] = format_streamdetails(item["streamdetails"] or {})
+        # the json api returns the image:// wrapped urls
+        for key, value in item.get("art", {}).iteritems():
+            values["Art(%s)" % key] = self.metadatautils.get_clean_image(value)
+        return values
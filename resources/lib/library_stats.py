@@ -0,0 +1,120 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+    script.skin.helper.service
+    Helper service and scripts for Kodi skins
+    library_stats.py
+    Totals of the library/addons/favourites/pvr, only recomputed when kodi tells us something changed
+'''
+
+import threading
+import time
+from utils import kodi_json, log_msg, log_exception, getCondVisibility
+import xbmcvfs
+
+ADDON_TYPES = [
+    ("executable", "SkinHelper.TotalProgramAddons"),
+    ("video", "SkinHelper.TotalVideoAddons"),
+    ("audio", "SkinHelper.TotalAudioAddons"),
+    ("image", "SkinHelper.TotalPicturesAddons")
+]
+CATEGORIES = ["addons", "favourites", "tvchannels", "radiochannels", "moviesets"]
+FAVOURITES_FILE = "special://profile/favourites.xml"
+
+
+class LibraryStats(object):
+    '''keeps the SkinHelper.Total* window properties up to date'''
+
+    def __init__(self, win):
+        self.win = win
+        self.values = {}
+        self.dirty = set(CATEGORIES)
+        self.favourites_mtime = None
+        self.last_refresh = 0
+        self._lock = threading.Lock()
+
+    def on_notification(self, method, mediatype=""):
+        '''mark the totals affected by the kodi notification as outdated'''
+        if method in ["VideoLibrary.OnUpdate", "VideoLibrary.OnRemove"] and mediatype in ["movie", "set", ""]:
+            self.dirty.add("moviesets")
+        elif method in ["VideoLibrary.OnScanFinished", "VideoLibrary.OnCleanFinished"]:
+            self.dirty.add("moviesets")
+        elif method.startswith("Addon."):
+            self.dirty.add("addons")
+        elif method == "System.OnWake":
+            self.dirty.update(["tvchannels", "radiochannels"])
+
+    def check_pvr_and_favourites(self):
+        '''
+            kodi has no notifications for these, check the favourites file and recount the channels.
+            the addons are recounted as well, the Addon.* notifications only exist since kodi 18.
+        '''
+        mtime = xbmcvfs.Stat(FAVOURITES_FILE).st_mtime() if xbmcvfs.exists(FAVOURITES_FILE) else 0
+        if mtime != self.favourites_mtime:
+            self.favourites_mtime = mtime
+            self.dirty.add("favourites")
+        self.dirty.update(["tvchannels", "radiochannels", "addons"])
+
+    def refresh_due(self, interval=10):
+        '''returns True if there are outdated totals, rate limited to prevent refreshes during a library scan'''
+        return bool(self.dirty) and time.time() - self.last_refresh >= interval
+
+    def refresh(self, cancelled=None):
+        '''recompute the outdated totals and publish them'''
+        with self._lock:
+            self.last_refresh = time.time()
+            for category in CATEGORIES:
+                if category not in self.dirty:
+                    continue
+                if cancelled and cancelled():
+                    return
+                self.dirty.discard(category)
+                try:
+                    for key, value in getattr(self, "count_%s" % category)():
+                        self.publish(key, value)
+                except Exception as exc:
+                    log_exception(__name__, exc)
+                    self.dirty.add(category)
+
+    def publish(self, key, value):
+        '''set the window property if the value changed'''
+        if value is not None and self.values.get(key) != value:
+            self.values[key] = value
+            self.win.setProperty(key, value)
+            log_msg("LibraryStats - %s: %s" % (key, value))
+
+    @staticmethod
+    def count_addons():
+        '''total of all addons and per addon type'''
+        yield "SkinHelper.TotalAddons", "%s" % len(kodi_json('Addons.GetAddons'))
+        for addontype, key in ADDON_TYPES:
+            yield key, "%s" % len(kodi_json('Addons.GetAddons', {"content": addontype}))
+
+    @staticmethod
+    def count_favourites():
+        '''total of the favourites'''
+        favs = kodi_json('Favourites.GetFavourites')
+        yield "SkinHelper.TotalFavourites", ("%s" % len(favs) if favs else None)
+
+    @staticmethod
+    def count_tvchannels():
+        '''total of the tv channels'''
+        if getCondVisibility("Pvr.HasTVChannels"):
+            yield "SkinHelper.TotalTVChannels", "%s" % len(
+                kodi_json('PVR.GetChannels', {"channelgroupid": "alltv"}))
+
+    @staticmethod
+    def count_radiochannels():
+        '''total of the radio channels'''
+        if getCondVisibility("Pvr.HasRadioChannels"):
+            yield "SkinHelper.TotalRadioChannels", "%s" % len(
+                kodi_json('PVR.GetChannels', {"channelgroupid": "allradio"}))
+
+    @staticmethod
+    def count_moviesets():
+        '''total of the moviesets and the movies in a set, counted from a single query for all movies'''
+        moviesets = kodi_json('VideoLibrary.GetMovieSets')
+        movies = kodi_json('VideoLibrary.GetMovies', {"properties": ["setid"]}, "movies")
+        yield "SkinHelper.TotalMovieSets", "%s" % len(moviesets)
+        yield "SkinHelper.TotalMoviesInSets", "%s" % len([movie for movie in movies if movie.get("setid")])
@@ -0,0 +1,162 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+    script.skin.helper.service
+    Helper service and scripts for Kodi skins
+    library_updater.py
+    Refreshes the cached details of updated library items in rate limited batches
+'''
+
+import threading
+from collections import OrderedDict
+from functools import partial
+from utils import log_msg, log_exception, getCondVisibility, get_skin_int
+import xbmc
+
+
+class LibraryUpdater(object):
+    '''
+        the updated items are collected for a short time window, deduplicated and processed in batches.
+        the work per parent (artwork of the tvshow/album) is done once after all pending items are processed,
+        during a library scan it's postponed to a single consolidated pass when the scan finished.
+    '''
+
+    def __init__(self, metadatautils, scheduler, metrics, monitor):
+        self.metadatautils = metadatautils
+        self.monitor = monitor
+        self.scheduler = scheduler
+        self.pending = OrderedDict()
+        self.parents = OrderedDict()
+        self.scanning = set()
+        self.scheduled = False
+        self.batch_size = 25
+        self.processed = 0
+        self.deduplicated = 0
+        self._lock = threading.Lock()
+        self._busy = threading.Lock()
+        metrics.gauge("libraryupdater", self.stats)
+
+    def on_notification(self, method, mediatype="", dbid=0, transaction=False):
+        '''collect the updated items and keep track of the library scans'''
+        library, _, event = method.partition(".")
+        if event == "OnScanStarted":
+            self.scanning.add(library)
+        elif event == "OnScanFinished":
+            self.scanning.discard(library)
+            log_msg("LibraryUpdater - %s scan finished, %s items pending" % (library, len(self.pending)))
+            # the final pass starts right away
+            self.schedule(0)
+        elif event == "OnUpdate" and mediatype and dbid:
+            with self._lock:
+                key = (mediatype, dbid)
+                if key in self.pending:
+                    self.deduplicated += 1
+                # kodi sets the transaction flag for newly added items
+                self.pending[key] = self.pending.get(key, False) or transaction
+            self.schedule()
+
+    def schedule(self, delay=None):
+        '''start processing after the time window, unless we're already processing'''
+        with self._lock:
+            if self.scheduled and delay is None:
+                return
+            self.scheduled = True
+        if delay is None:
+            delay = get_skin_int("SkinHelper.LibraryUpdate.Window", 5)
+        self.batch_size = max(get_skin_int("SkinHelper.LibraryUpdate.BatchSize", 25), 1)
+        self.scheduler.schedule("library.update", self.process_batch, delay=delay, background=True,
+                                interval=get_skin_int("SkinHelper.LibraryUpdate.Interval", 2))
+
+    def process_batch(self):
+        '''process the next batch of items, returns False when there's nothing left to do'''
+        with self._busy:
+            with self._lock:
+                batch = []
+                while self.pending and len(batch) < self.batch_size:
+                    batch.append(self.pending.popitem(last=False))
+            enable_animatedart = getCondVisibility("Skin.HasSetting(SkinHelper.EnableAnimatedPosters)") == 1
+            parents = OrderedDict()
+            for (mediatype, dbid), transaction in batch:
+                if self.monitor.abortRequested():
+                    return False
+                try:
+                    self.process_item(mediatype, dbid, transaction, enable_animatedart, parents)
+                except Exception as exc:
+                    # one bad item should not cost us the rest of the batch
+                    log_exception(__name__, exc)
+                self.processed += 1
+            with self._lock:
+                self.parents.update(parents)
+                if self.pending:
+                    return True
+                if self.scanning:
+                    # wait for the end of the scan (or more updates) to process the parents
+                    self.scheduled = False
+                    return False
+                parents = self.parents
+                self.parents = OrderedDict()
+                self.scheduled = False
+            for func in parents.itervalues():
+                try:
+                    func()
+                except Exception as exc:
+                    log_exception(__name__, exc)
+            return False
+
+    def process_item(self, mediatype, dbid, transaction, enable_animatedart, parents):
+        '''refresh the details of an updated item, the work per parent is added to parents'''
+        if mediatype == "movie" and transaction and enable_animatedart:
+            movie = self.metadatautils.kodidb.movie(dbid)
+            imdb_id = movie.get("imdbnumber", "")
+            if not imdb_id and "uniqueid" in movie:
+                for value in movie["uniqueid"]:
+                    if value.startswith("tt"):
+                        imdb_id = value
+            if imdb_id:
+                self.metadatautils.get_animated_artwork(imdb_id)
+
+        if mediatype in ["movie", "episode", "musicvideo"]:
+            self.metadatautils.get_streamdetails(dbid, mediatype, ignore_cache=True)
+            if transaction:
+                if mediatype == "episode":
+                    # the artwork of the tvshow is scanned once for all its episodes
+                    mediatype = "tvshow"
+                    dbid = self.metadatautils.kodidb.episode(dbid)["tvshowid"]
+                parents[(mediatype, dbid)] = partial(self.artwork_downloader, mediatype, dbid)
+
+        # for music content we only flush the cache, once per album
+        elif mediatype == "song":
+            song = self.metadatautils.kodidb.song(dbid)
+            if song:
+                parents[("album", song["artist"][0], song["album"])] = partial(
+                    self.metadatautils.get_music_artwork, song["artist"][0], song["album"], song["title"],
+                    str(song["disc"]), ignore_cache=True, flush_cache=True)
+        elif mediatype == "album":
+            album = self.metadatautils.kodidb.album(dbid)
+            if album:
+                parents[("album", album["artist"][0], album["title"])] = partial(
+                    self.metadatautils.get_music_artwork, album["artist"][0], album["title"],
+                    ignore_cache=True, flush_cache=True)
+        elif mediatype == "artist":
+            artist = self.metadatautils.kodidb.artist(dbid)
+            if artist:
+                parents[("artist", artist["artist"])] = partial(
+                    self.metadatautils.get_music_artwork, artist["artist"], ignore_cache=True, flush_cache=True)
+
+    @staticmethod
+    def artwork_downloader(media_type, dbid):
+        '''trigger artwork scan with artwork downloader if enabled'''
+        if getCondVisibility(
+                "System.HasAddon(script.artwork.downloader) + Skin.HasSetting(EnableArtworkDownloader)"):
+            xbmc.executebuiltin(
+                "RunScript(script.artwork.downloader,silent=true,mediatype=%s,dbid=%s)" % (media_type, dbid))
+
+    def stats(self):
+        '''return a dict with the counters'''
+        return {
+            "pending": len(self.pending),
+            "parents": len(self.parents),
+            "processed": self.processed,
+            "deduplicated": self.deduplicated
+        }
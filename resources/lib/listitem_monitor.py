@@ -8,26 +8,72 @@
 '''
 
 import threading
-import thread
-from utils import log_msg, log_exception, get_current_content_type, kodi_json, prepare_win_props, merge_dict, getCondVisibility
+import time
+from functools import partial
+from utils import log_msg, log_exception, kodi_json, prepare_win_props, merge_dict, getCondVisibility
+from utils import get_skin_int, get_infolabels
+from content_types import get_current_content_type
+from lru_cache import LRUCache
+from worker_pool import WorkerPool, PRIORITY_HIGH, PRIORITY_LOW
+from window_props import WindowProperties, DoubleBufferedProperties
+from listitem_store import ListItemStore
+from library_preload import LibraryPreload
+from adaptive_poller import AdaptivePoller
+from invalidation_bus import get_library
+from state_probe import StateProbe, MODE_MANUAL_LOOKUP, MODE_MODAL, MODE_SCROLLING, MODE_MONITOR
 import xbmc
 from simplecache import SimpleCache
 
+# the listitem infolabels we collect for the lookups
+LISTITEM_ID_PROPS = ["TvshowTitle", "Artist", "Album", "Label", "DBID", "Title"]
+LISTITEM_BASIC_PROPS = ["dbtype", "dbid", "imdbnumber"]
+LISTITEM_PROPS = {
+    "generic": ["label", "title", "filenameandpath", "year", "genre", "path", "folderpath",
+                "duration", "plot", "plotoutline", "label2", "icon", "thumb"],
+    "media": ["studio", "tvshowtitle", "premiered", "director", "writer",
+              "firstaired", "tagline", "rating", "season", "episode"],
+    "music": ["artist", "album", "rating", "albumartist", "discnumber"],
+    "pvr": ["channel", "channelname"]
+}
+# the infolabels which depend on the container (e.g. the sort method), these are never taken from the preload
+LISTITEM_CONTAINER_PROPS = ["label2"]
+LISTITEM_ART_PROPS = ["fanart", "poster", "clearlogo", "clearart",
+                      "landscape", "thumb", "banner", "discart", "characterart"]
+
+# deadline (in seconds since the start of the lookup) for the metadata provider stages of video items
+LOCAL_STAGES = ["extrafanart", "extraposter", "studiologo", "streamdetails"]
+STAGE_DEADLINES = {
+    "extrafanart": 2,
+    "extraposter": 2,
+    "studiologo": 2,
+    "streamdetails": 2,
+    "imdbtvdb": 8,
+    "omdb": 10,
+    "top250": 10,
+    "tvdb": 10,
+    "tmdb": 10,
+    "animatedart": 12,
+    "extendedart": 15
+}
+
 
 class ListItemMonitor(threading.Thread):
     '''Our main class monitoring the kodi listitems and providing additional information'''
     event = None
     exit = False
-    delayed_task_interval = 1795
-    listitem_details = {}
-    all_window_props = {}
     cur_listitem = ""
     last_folder = ""
     last_listitem = ""
-    foldercontent = {}
+    last_content_type = ""
+    preload_folder = ""
     screensaver_setting = None
     screensaver_disabled = False
     lookup_busy = {}
+    pending_flush = None
+    last_focus_change = 0
+    prefetch_generation = 0
+    prefetch_done = True
+    prefetch_count = 1
     enable_extendedart = False
     enable_musicart = False
     enable_animatedart = False
@@ -41,6 +87,32 @@ class ListItemMonitor(threading.Thread):
         self.metadatautils = kwargs.get("metadatautils")
         self.win = kwargs.get("win")
         self.kodimonitor = kwargs.get("monitor")
+        self.library_stats = kwargs.get("library_stats")
+        self.metrics = kwargs.get("metrics")
+        self.scheduler = kwargs.get("scheduler")
+        self.manifest = kwargs.get("manifest")
+        self.invalidation = kwargs.get("invalidation")
+        self.channel_index = kwargs.get("channel_index")
+        self.win_props = WindowProperties(self.win)
+        # bounded caches for the listitem properties and the contenttype per folder
+        self.listitem_details = LRUCache(max_items=1000, max_bytes=8 * 1024 * 1024, ttl=1800)
+        self.foldercontent = LRUCache(max_items=250)
+        # the computed listitem properties are also stored on disk to survive restarts
+        self.listitem_store = ListItemStore()
+        # the infolabels of all items in a library folder are preloaded in bulk
+        self.library_preload = LibraryPreload(self.metadatautils)
+        # fixed number of workers for the listitem lookups, the focused item always goes first
+        self.lookup_pool = WorkerPool(num_workers=3, name="ListItemLookup")
+        # workers for the metadata providers which are queried concurrently within a lookup
+        self.provider_pool = WorkerPool(num_workers=4, name="ListItemProviders")
+        # the listitem polling slows down while the focus and folder stay the same
+        self.poller = AdaptivePoller()
+        self.state_probe = StateProbe(LISTITEM_ID_PROPS)
+        self.metrics.gauge("poller", self.poller.stats)
+        # win_props is swapped when the skin toggles the double buffering
+        self.metrics.gauge("listitem.windowprops", lambda: self.win_props.stats())
+        # the cached library items are evicted when kodi tells us they changed
+        self.invalidation.subscribe(self.invalidate_cached)
         self.event = threading.Event()
         threading.Thread.__init__(self, *args)
 
@@ -48,6 +120,9 @@ class ListItemMonitor(threading.Thread):
         '''called when the thread has to stop working'''
         log_msg("ListItemMonitor - stop called")
         self.exit = True
+        self.lookup_pool.stop()
+        self.provider_pool.stop()
+        self.listitem_store.close()
         self.cache.close()
         self.event.set()
         self.event.clear()
@@ -57,60 +132,56 @@ class ListItemMonitor(threading.Thread):
         '''our main loop monitoring the listitem and folderpath changes'''
         log_msg("ListItemMonitor - started")
         self.get_settings()
+        self.lookup_pool.start()
+        self.provider_pool.start()
 
-        while not self.exit:
+        # periodic tasks, these run on the scheduler thread so they never block the listitem monitoring
+        self.scheduler.schedule("listitem.background", self.queue_background_work, interval=1800, delay=5, jitter=60)
+        self.scheduler.schedule("listitem.librarystats", self.queue_library_stats, interval=10)
+        self.scheduler.schedule("listitem.screensaver", self.check_screensaver, interval=1)
+        self.scheduler.schedule("listitem.osd", self.check_osd, interval=0.5)
 
-            # check screensaver and OSD
-            self.check_screensaver()
-            self.check_osd()
+        while not self.exit:
 
-            # do some background stuff every 30 minutes
-            if (self.delayed_task_interval >= 1800) and not self.exit:
-                thread.start_new_thread(self.do_background_work, ())
-                self.delayed_task_interval = 0
+            # read the complete gui state at once
+            state = self.state_probe.read()
 
             # skip if any of the artwork context menus is opened
-            if self.win.getProperty("SkinHelper.Artwork.ManualLookup"):
+            if state.mode == MODE_MANUAL_LOOKUP:
                 self.reset_win_props()
                 self.last_listitem = ""
-                self.listitem_details = {}
+                self.listitem_details.clear()
                 self.kodimonitor.waitForAbort(3)
-                self.delayed_task_interval += 3
 
             # skip when modal dialogs are opened (e.g. textviewer in musicinfo dialog)
-            elif getCondVisibility(
-                    "Window.IsActive(DialogSelect.xml) | Window.IsActive(progressdialog) | "
-                    "Window.IsActive(contextmenu) | Window.IsActive(busydialog)"):
+            elif state.mode == MODE_MODAL:
                 self.kodimonitor.waitForAbort(2)
-                self.delayed_task_interval += 2
                 self.last_listitem = ""
 
             # skip when container scrolling
-            elif getCondVisibility(
-                    "Container.OnScrollNext | Container.OnScrollPrevious | Container.Scrolling"):
+            elif state.mode == MODE_SCROLLING:
                 self.kodimonitor.waitForAbort(1)
-                self.delayed_task_interval += 1
                 self.last_listitem = ""
 
             # media window is opened or widgetcontainer set - start listitem monitoring!
-            elif getCondVisibility("Window.IsMedia | "
-                                        "!IsEmpty(Window(Home).Property(SkinHelper.WidgetContainer))"):
-                self.monitor_listitem()
-                self.kodimonitor.waitForAbort(0.15)
-                self.delayed_task_interval += 0.15
+            elif state.mode == MODE_MONITOR:
+                last_state = (self.last_folder, self.last_listitem)
+                self.monitor_listitem(state)
+                self.poller.tick((self.last_folder, self.last_listitem) != last_state)
+                self.poller.wait(self.kodimonitor)
 
             # flush any remaining window properties
-            elif self.all_window_props:
+            elif self.win_props:
                 self.reset_win_props()
                 self.win.clearProperty("SkinHelper.ContentHeader")
                 self.win.clearProperty("contenttype")
                 self.win.clearProperty("curlistitem")
                 self.last_listitem = ""
+                self.last_content_type = ""
 
             # other window active - do nothing
             else:
                 self.kodimonitor.waitForAbort(1)
-                self.delayed_task_interval += 1
 
     def get_settings(self):
         '''collect our skin settings that control the monitoring'''
@@ -122,10 +193,32 @@ class ListItemMonitor(threading.Thread):
         self.enable_pvrart = getCondVisibility(
             "Skin.HasSetting(SkinHelper.EnablePVRThumbs) + PVR.HasTVChannels") == 1
         self.enable_forcedviews = getCondVisibility("Skin.HasSetting(SkinHelper.ForcedViews.Enabled)") == 1
+        # skins can choose to get the listitem properties double buffered to prevent partial updates
+        double_buffer = getCondVisibility("Skin.HasSetting(SkinHelper.ListItem.DoubleBuffer)") == 1
+        if double_buffer != isinstance(self.win_props, DoubleBufferedProperties):
+            self.switch_win_props(double_buffer)
+        # number of items before and after the focused item to prefetch, 0 disables the prefetching
+        self.prefetch_count = get_skin_int("SkinHelper.ListItemPrefetch", 1)
+        # maximum wait between the polls of the listitem while nothing changes
+        self.poller.configure(get_skin_int("SkinHelper.ListItemPoll.MaxInterval", 1000) / 1000.0)
+        # the budget of the listitem cache can be tuned by the skin (e.g. for low memory devices),
+        # the ttl only applies to non library items as those are invalidated by the library notifications
+        self.listitem_details.configure(
+            max_items=get_skin_int("SkinHelper.ListItemCache.MaxItems", 1000),
+            max_bytes=get_skin_int("SkinHelper.ListItemCache.MaxSizeKB", 8192) * 1024,
+            ttl=get_skin_int("SkinHelper.ListItemCache.TTL", 1800))
+        # failed remote lookups are remembered shorter than the results
+        self.metadatautils.configure_negative_cache(
+            max_items=get_skin_int("SkinHelper.NegativeCache.MaxItems", 2000),
+            ttl=get_skin_int("SkinHelper.NegativeCache.TTL", 3600))
         studiologos_path = xbmc.getInfoLabel("Skin.String(SkinHelper.StudioLogos.Path)").decode("utf-8")
         if studiologos_path != self.metadatautils.studiologos_path:
-            self.listitem_details = {}
+            self.listitem_details.clear()
             self.metadatautils.studiologos_path = studiologos_path
+        # the stored listitems are only valid for the current features and studiologos
+        self.listitem_store.set_version(
+            self.enable_extendedart, self.enable_musicart, self.enable_animatedart, self.enable_extrafanart,
+            self.enable_extraposter, self.enable_pvrart, studiologos_path, self.manifest.checksum)
         # set additional window props to control contextmenus as using the skinsetting gives unreliable results
         for skinsetting in ["EnableAnimatedPosters", "EnableMusicArt", "EnablePVRThumbs"]:
             if getCondVisibility("Skin.HasSetting(SkinHelper.%s)" % skinsetting):
@@ -133,20 +226,12 @@ class ListItemMonitor(threading.Thread):
             else:
                 self.win.clearProperty("SkinHelper.%s" % skinsetting)
 
-    def monitor_listitem(self):
+    def monitor_listitem(self, state):
         '''Monitor listitem details'''
 
-        cur_folder, cont_prefix = self.get_folderandprefix()
-        # identify current listitem - prefer parent folder (tvshows, music)
-        cur_listitem = xbmc.getInfoLabel(
-            "$INFO[%sListItem.TvshowTitle]$INFO[%sListItem.Artist]$INFO[%sListItem.Album]" %
-            (cont_prefix, cont_prefix, cont_prefix)).decode('utf-8')
-        if not cur_listitem:
-            # fallback to generic approach
-            cur_listitem = xbmc.getInfoLabel(
-                "$INFO[%sListItem.Label]$INFO[%sListItem.DBID]$INFO[%sListItem.Title]" %
-                (cont_prefix, cont_prefix, cont_prefix)).decode('utf-8')
-                
+        cur_folder, cont_prefix = state.folder, state.cont_prefix
+        cur_listitem = self.get_listitem_id(state.listitem)
+
         if self.exit:
             return
 
@@ -161,6 +246,8 @@ class ListItemMonitor(threading.Thread):
             if not cont_prefix and content_type:
                 self.set_forcedview(content_type)
                 self.set_content_header(content_type)
+            if not cont_prefix:
+                self.preload_folder_items(cur_folder)
         else:
             content_type = self.get_content_type(cur_folder, cur_listitem, cont_prefix)
 
@@ -170,58 +257,108 @@ class ListItemMonitor(threading.Thread):
         # only perform actions when the listitem has actually changed
         if cur_listitem != self.last_listitem:
             self.last_listitem = cur_listitem
+            self.last_focus_change = time.time()
+            self.prefetch_done = False
             self.win.setProperty("curlistitem", cur_listitem)
             if cur_listitem and cur_listitem != "..":
-                # set listitem details in background thread
-                thread.start_new_thread(
-                    self.set_listitem_details, (cur_listitem, content_type, cont_prefix))
-
-    def get_folderandprefix(self):
-        '''get the current folder and prefix'''
-        cur_folder = ""
-        cont_prefix = ""
-        try:
-            widget_container = self.win.getProperty("SkinHelper.WidgetContainer").decode('utf-8')
-            if getCondVisibility("Window.IsActive(movieinformation)"):
-                cont_prefix = ""
-                cur_folder = xbmc.getInfoLabel(
-                    "$INFO[Window.Property(xmlfile)]$INFO[Container.FolderPath]"
-                    "$INFO[Container.NumItems]$INFO[Container.Content]").decode('utf-8')
-            elif widget_container:
-                cont_prefix = "Container(%s)." % widget_container
-                cur_folder = xbmc.getInfoLabel(
-                    "widget-%s-$INFO[Container(%s).NumItems]-$INFO[Container(%s).ListItemAbsolute(1).Label]" %
-                    (widget_container, widget_container, widget_container)).decode('utf-8')
-            else:
-                cont_prefix = ""
-                cur_folder = xbmc.getInfoLabel(
-                    "$INFO[Window.Property(xmlfile)]$INFO[Container.FolderPath]$INFO[Container.NumItems]$INFO[Container.Content]").decode(
-                    'utf-8')
-        except Exception as exc:
-            log_exception(__name__, exc)
-            cur_folder = ""
-            cont_prefix = ""
-        return (cur_folder, cont_prefix)
+                # set listitem details in the background, any older lookups are superseded by this one
+                self.lookup_pool.submit(
+                    self.set_listitem_details, (cur_listitem, content_type, "%sListItem." % cont_prefix),
+                    priority=PRIORITY_HIGH, cancel_check=partial(self.lookup_cancelled, cur_listitem))
+        # user is resting on the same item: warm the cache for the surrounding items
+        elif not self.prefetch_done and time.time() - self.last_focus_change > 1 \
+                and cur_listitem not in self.lookup_busy:
+            self.prefetch_done = True
+            if self.prefetch_count and content_type != "sets":
+                self.prefetch_neighbours(cur_listitem, content_type, cont_prefix)
+
+    def preload_folder_items(self, cur_folder):
+        '''preload the details of all items if the folder is a library node'''
+        self.preload_folder = ""
+        folderpath = xbmc.getInfoLabel("Container.FolderPath").decode('utf-8')
+        if self.library_preload.get_library_node(folderpath):
+            self.preload_folder = cur_folder
+            self.lookup_pool.submit(
+                self.library_preload.preload, (folderpath, partial(self.preload_cancelled, cur_folder)),
+                priority=PRIORITY_LOW, cancel_check=partial(self.preload_cancelled, cur_folder))
+
+    def preload_cancelled(self, cur_folder):
+        '''preloading stops when the user leaves the folder'''
+        return self.exit or cur_folder != self.last_folder
+
+    def prefetch_neighbours(self, cur_listitem, content_type, cont_prefix):
+        '''queue low priority lookups for the items around the focused item'''
+        self.prefetch_generation += 1
+        offsets = []
+        for count in range(1, self.prefetch_count + 1):
+            offsets += [count, -count]
+        # identify all neighbours at once
+        labels = ["ListItem(%s).%s" % (offset, prop) for offset in offsets for prop in LISTITEM_ID_PROPS]
+        values = get_infolabels(labels, cont_prefix)
+        for offset in offsets:
+            listitem_id = self.get_listitem_id(
+                dict((prop, values["ListItem(%s).%s" % (offset, prop)]) for prop in LISTITEM_ID_PROPS))
+            if listitem_id and listitem_id not in (cur_listitem, "..") and listitem_id not in self.listitem_details:
+                cancelled = partial(self.prefetch_cancelled, cur_listitem, listitem_id, self.prefetch_generation)
+                self.lookup_pool.submit(
+                    self.prefetch_listitem, (listitem_id, content_type, cont_prefix, offset, cancelled),
+                    priority=PRIORITY_LOW, cancel_check=cancelled)
+
+    def prefetch_listitem(self, listitem_id, content_type, cont_prefix, offset, cancelled):
+        '''lookup the details for one of the neighbours of the focused item'''
+        self.set_listitem_details(
+            listitem_id, content_type, "%sListItem(%s)." % (cont_prefix, offset), cancelled)
+        if listitem_id == self.last_listitem and listitem_id not in self.listitem_details:
+            # the focus moved to this item before we could read it, continue as a regular lookup
+            self.set_listitem_details(listitem_id, content_type, "%sListItem." % cont_prefix)
+
+    def prefetch_cancelled(self, anchor_listitem, listitem_id, generation):
+        '''prefetching stops when the focus moves elsewhere, unless it moved to the item being prefetched'''
+        if self.exit or generation != self.prefetch_generation:
+            return True
+        return self.last_listitem not in (anchor_listitem, listitem_id)
+
+    @staticmethod
+    def get_listitem_id(values):
+        '''identify a listitem from its infolabels - prefer parent folder (tvshows, music)'''
+        listitem_id = values["TvshowTitle"] + values["Artist"] + values["Album"]
+        if not listitem_id:
+            # fallback to generic approach
+            listitem_id = values["Label"] + values["DBID"] + values["Title"]
+        return listitem_id
 
     def get_content_type(self, cur_folder, cur_listitem, cont_prefix):
         '''get contenttype for current folder'''
-        content_type = ""
-        if cur_folder in self.foldercontent:
-            content_type = self.foldercontent[cur_folder]
-        elif cur_folder and cur_listitem:
-            # always wait for the content_type because some listings can be slow
-            for i in range(20):
-                content_type = get_current_content_type(cont_prefix)
-                if self.exit:
-                    return ""
-                if content_type:
-                    break
-                else:
-                    xbmc.sleep(250)
-            self.foldercontent[cur_folder] = content_type
-        self.win.setProperty("contenttype", content_type)
+        content_type = self.foldercontent.get(cur_folder)
+        if content_type is None:
+            content_type = ""
+            if cur_folder and cur_listitem:
+                # always wait for the content_type because some listings can be slow
+                for i in range(20):
+                    content_type = get_current_content_type(cont_prefix)
+                    if self.exit:
+                        return ""
+                    if content_type:
+                        break
+                    else:
+                        xbmc.sleep(250)
+                self.foldercontent.set(cur_folder, content_type)
+        if content_type != self.last_content_type:
+            self.last_content_type = content_type
+            self.win.setProperty("contenttype", content_type)
         return content_type
 
+    def queue_background_work(self):
+        '''do some background stuff every 30 minutes'''
+        if not self.exit:
+            self.lookup_pool.submit(self.do_background_work, priority=PRIORITY_LOW)
+
+    def queue_library_stats(self):
+        '''recompute the library totals which are outdated by kodi notifications'''
+        if self.library_stats.refresh_due() and not self.exit:
+            self.library_stats.last_refresh = time.time()
+            self.lookup_pool.submit(self.library_stats.refresh, (lambda: self.exit,), priority=PRIORITY_LOW)
+
     def check_screensaver(self):
         '''Allow user to disable screensaver on fullscreen music playback'''
         if getCondVisibility(
@@ -258,148 +395,267 @@ class ListItemMonitor(threading.Thread):
                 window = "musicosd"
             else:
                 seconds = ""
-            if seconds and seconds != "0":
-                while getCondVisibility("Window.IsActive(%s)" % window):
-                    if getCondVisibility("System.IdleTime(%s)" % seconds):
-                        if getCondVisibility("Window.IsActive(%s)" % window):
-                            xbmc.executebuiltin("Dialog.Close(%s)" % window)
-                    else:
-                        xbmc.sleep(500)
+            # checked again on the next run of the task while the osd stays open
+            if seconds and seconds != "0" and getCondVisibility("System.IdleTime(%s)" % seconds):
+                xbmc.executebuiltin("Dialog.Close(%s)" % window)
 
-    def set_listitem_details(self, cur_listitem, content_type, prefix):
+    def set_listitem_details(self, cur_listitem, content_type, li_prefix, cancelled=None):
         '''set the window properties based on the current listitem'''
+        if not cancelled:
+            cancelled = partial(self.lookup_cancelled, cur_listitem)
         try:
-            if cur_listitem in self.listitem_details:
-                # data already in memory
-                all_props = self.listitem_details[cur_listitem]
-            else:
+            all_props = self.listitem_details.get(cur_listitem)
+            self.metrics.hit("listitem.cache", all_props is not None)
+            if all_props is None:
                 # skip if another lookup for the same listitem is already in progress...
-                if self.lookup_busy.get(cur_listitem) or self.exit:
+                if self.lookup_busy.get(cur_listitem) or cancelled():
                     return
                 self.lookup_busy[cur_listitem] = True
-
-                # clear all window props, do this delayed to prevent flickering of the screen
-                thread.start_new_thread(self.delayed_flush, (cur_listitem,))
-
-                # wait if we already have more than 5 items in the queue
-                while len(self.lookup_busy) > 5:
-                    xbmc.sleep(100)
-                    if self.exit or cur_listitem != self.last_listitem:
-                        self.lookup_busy.pop(cur_listitem, None)
-                        return
-
-                # prefer listitem's contenttype over container's contenttype
-                dbtype = xbmc.getInfoLabel("%sListItem.DBTYPE" % prefix)
-                if not dbtype:
-                    dbtype = xbmc.getInfoLabel("%sListItem.Property(DBTYPE)" % prefix)
-                if dbtype:
-                    content_type = dbtype + "s"
-
-                # collect details from listitem
-                details = self.get_listitem_details(content_type, prefix)
-                
-                if self.exit:
+                try:
+                    # clear all window props, do this delayed to prevent flickering of the screen
+                    if cur_listitem == self.last_listitem:
+                        self.pending_flush = cur_listitem
+                        self.scheduler.schedule(
+                            "listitem.flush", partial(self.delayed_flush, cur_listitem), delay=0.5, repeat=False)
+                    with self.metrics.span("listitem.lookup"):
+                        all_props = self.lookup_listitem_props(cur_listitem, content_type, li_prefix, cancelled)
+                finally:
+                    self.lookup_busy.pop(cur_listitem, None)
+                if all_props is None:
+                    # lookup was cancelled because the listitem is no longer relevant
                     return
 
-                # music content
-                if content_type in ["albums", "artists", "songs"] and self.enable_musicart:
-                    details = self.metadatautils.extend_dict(details, self.metadatautils.get_music_artwork(
-                        details["artist"], details["album"], details["title"], details["discnumber"]))
-                # moviesets
-                elif details["path"].startswith("videodb://movies/sets/") and details["dbid"]:
-                    details = self.metadatautils.extend_dict(
-                        details, self.metadatautils.get_moviesetdetails(
-                            details["title"], details["dbid"]), ["year"])
-                    content_type = "sets"
-                # video content
-                elif content_type in ["movies", "setmovies", "tvshows", "seasons", "episodes", "musicvideos"]:
-
-                    # get imdb and tvdbid
-                    details["imdbnumber"], tvdbid = self.metadatautils.get_imdbtvdb_id(
-                        details["title"], content_type,
-                        details["year"], details["imdbnumber"], details["tvshowtitle"])
-                        
-                    if self.exit:
-                        return
-
-                    # generic video properties (studio, streamdetails, omdb, top250)
-                    details = merge_dict(details,
-                                         self.get_directors_writers(details["director"], details["writer"]))
-                    if self.enable_extrafanart:
-                        if not details["filenameandpath"]:
-                            details["filenameandpath"] = details["path"]
-                        if "videodb://" not in details["filenameandpath"]:
-                            efa = self.metadatautils.get_extrafanart(details["filenameandpath"])
-                            if efa:
-                                details["art"] = merge_dict(details["art"], efa["art"])
-                    if self.enable_extraposter:
-                        if not details["filenameandpath"]:
-                            details["filenameandpath"] = details["path"]
-                        if "videodb://" not in details["filenameandpath"]:
-                            efa = self.metadatautils.get_extraposter(details["filenameandpath"])
-                            if efa:
-                                details["art"] = merge_dict(details["art"], efa["art"])
-                    if self.exit:
-                        return
-
-                    details = merge_dict(details, self.metadatautils.get_duration(details["duration"]))
-                    details = merge_dict(details, self.get_genres(details["genre"]))
-                    details = merge_dict(details, self.metadatautils.get_studio_logo(details["studio"]))
-                    details = merge_dict(details, self.metadatautils.get_omdb_info(details["imdbnumber"]))
-                    details = merge_dict(
-                        details, self.get_streamdetails(
-                            details["dbid"], details["path"], content_type))
-                    details = merge_dict(details, self.metadatautils.get_top250_rating(details["imdbnumber"]))
-
-                    if self.exit:
-                        return
-
-                    # tvshows-only properties (tvdb)
-                    if content_type in ["tvshows", "seasons", "episodes"]:
-                        details = merge_dict(
-                            details, self.metadatautils.get_tvdb_details(
-                                details["imdbnumber"], tvdbid))
-
-                    # movies-only properties (tmdb, animated art)
-                    if content_type in ["movies", "setmovies"]:
-                        details = merge_dict(details, self.metadatautils.get_tmdb_details(details["imdbnumber"]))
-                        if details["imdbnumber"] and self.enable_animatedart:
-                            details = self.metadatautils.extend_dict(
-                                details, self.metadatautils.get_animated_artwork(
-                                    details["imdbnumber"]))
-
-                    if self.exit:
-                        return
-
-                    # extended art
-                    if self.enable_extendedart:
-                        tmdbid = details.get("tmdb_id", "")
-                        details = self.metadatautils.extend_dict(
-                            details, self.metadatautils.get_extended_artwork(
-                                details["imdbnumber"], tvdbid, tmdbid, content_type), [
-                                "posters", "clearlogos", "banners", "discarts", "cleararts", "characterarts"])
-                # monitor listitem props when PVR is active
-                elif content_type in ["tvchannels", "tvrecordings", "channels", "recordings", "timers", "tvtimers"]:
-                    details = self.get_pvr_artwork(details, prefix)
-
-                # process all properties
-                all_props = prepare_win_props(details)
-                if "sets" not in content_type:
-                    self.listitem_details[cur_listitem] = all_props
-
-                self.lookup_busy.pop(cur_listitem, None)
-
             if cur_listitem == self.last_listitem:
-                self.set_win_props(all_props)
+                with self.metrics.span("listitem.winprops"):
+                    self.set_win_props(all_props)
         except Exception as exc:
             log_exception(__name__, exc)
-            self.lookup_busy.pop(cur_listitem, None)
+
+    def lookup_cancelled(self, cur_listitem):
+        '''a lookup gets cancelled when the listitem lost focus in the meantime'''
+        return self.exit or cur_listitem != self.last_listitem
+
+    def lookup_listitem_props(self, cur_listitem, content_type, li_prefix, cancelled):
+        '''collect all details for the listitem, returns None if the lookup got cancelled'''
+        # collect details from listitem
+        with self.metrics.span("listitem.infolabels"):
+            listitem_id, details = self.get_listitem_details(content_type, li_prefix)
+        if listitem_id != cur_listitem:
+            # the listitem is no longer at this position (e.g. the focus moved)
+            return None
+
+        # prefer listitem's contenttype over container's contenttype
+        if details["dbtype"]:
+            content_type = details["dbtype"] + "s"
+
+        if cancelled():
+            return None
+
+        # the properties might have been stored in a previous session
+        storable = "sets" not in content_type and not details["path"].startswith("videodb://movies/sets/")
+        if storable:
+            all_props = self.listitem_store.get(details, content_type)
+            self.metrics.hit("listitem.store", all_props is not None)
+            if all_props is not None:
+                self.cache_listitem(cur_listitem, details, all_props)
+                return all_props
+
+        # results of a lookup with timed out stages are not cached
+        complete = True
+
+        # music content
+        if content_type in ["albums", "artists", "songs"] and self.enable_musicart and self.manifest.uses("musicart"):
+            with self.metrics.span("listitem.musicart"):
+                details = self.metadatautils.extend_dict(details, self.metadatautils.get_music_artwork(
+                    details["artist"], details["album"], details["title"], details["discnumber"]))
+        # moviesets
+        elif details["path"].startswith("videodb://movies/sets/") and details["dbid"]:
+            with self.metrics.span("listitem.movieset"):
+                details = self.metadatautils.extend_dict(
+                    details, self.metadatautils.get_moviesetdetails(
+                        details["title"], details["dbid"]), ["year"])
+            content_type = "sets"
+        # video content
+        elif content_type in ["movies", "setmovies", "tvshows", "seasons", "episodes", "musicvideos"]:
+            details, complete = self.lookup_video_details(cur_listitem, details, content_type, cancelled)
+            if details is None:
+                return None
+        # monitor listitem props when PVR is active
+        elif content_type in ["tvchannels", "tvrecordings", "channels", "recordings", "timers", "tvtimers"]:
+            with self.metrics.span("listitem.pvrart"):
+                details = self.get_pvr_artwork(details, li_prefix)
+
+        # process all properties
+        all_props = prepare_win_props(details)
+        if storable and complete:
+            self.cache_listitem(cur_listitem, details, all_props)
+            self.listitem_store.set(details, content_type, all_props)
+        return all_props
+
+    def cache_listitem(self, cur_listitem, details, all_props):
+        '''keep the props in memory, library items are tagged so they can be evicted when they change'''
+        library = get_library(details["dbtype"], details["dbid"])
+        if library:
+            tags = [u"%s.%s" % (details["dbtype"], details["dbid"]), u"library.%s" % library]
+            self.listitem_details.set(cur_listitem, all_props, ttl=0, tags=tags)
+        else:
+            self.listitem_details.set(cur_listitem, all_props)
+
+    def invalidate_cached(self, library, dbtype, dbid):
+        '''evict a changed library item (or the whole library) from all our caches'''
+        if dbtype:
+            evicted = self.listitem_details.invalidate(u"%s.%s" % (dbtype, dbid))
+            self.library_preload.invalidate(dbtype, dbid)
+            self.listitem_store.delete(dbtype, dbid)
+        else:
+            evicted = self.listitem_details.invalidate(u"library.%s" % library)
+            self.library_preload.clear()
+            self.listitem_store.flush()
+        if self.last_listitem in evicted:
+            # the focused item changed, look it up again
+            self.last_listitem = ""
+
+    def lookup_video_details(self, cur_listitem, details, content_type, cancelled):
+        '''
+            run the metadata providers for video content concurrently
+            returns a tuple of the details and a bool if all stages finished in time,
+            details is None if the lookup got cancelled
+        '''
+        start = time.time()
+        priority = PRIORITY_HIGH if cur_listitem == self.last_listitem else PRIORITY_LOW
+        stages = {}
+
+        def run_stage(name, func, *args):
+            '''start a provider stage in the background'''
+            stages[name] = self.provider_pool.submit(
+                self.metrics.timed("listitem.%s" % name, func), args, priority, cancelled)
+
+        # the stages of property groups the skin doesn't use are skipped
+        uses = self.manifest.uses
+
+        # local stages
+        if self.enable_extrafanart or self.enable_extraposter:
+            if not details["filenameandpath"]:
+                details["filenameandpath"] = details["path"]
+            if "videodb://" not in details["filenameandpath"]:
+                if self.enable_extrafanart and uses("extrafanart"):
+                    run_stage("extrafanart", self.metadatautils.get_extrafanart, details["filenameandpath"])
+                if self.enable_extraposter and uses("extraposter"):
+                    run_stage("extraposter", self.metadatautils.get_extraposter, details["filenameandpath"])
+        if uses("studiologo"):
+            run_stage("studiologo", self.metadatautils.get_studio_logo, details["studio"])
+        if uses("streamdetails"):
+            run_stage("streamdetails", self.get_streamdetails, details["dbid"], details["path"], content_type)
+        # remote stages
+        remote_groups = ["omdb", "top250", "tvdb", "tmdb", "animatedart", "extendedart"]
+        if uses(*remote_groups):
+            run_stage("imdbtvdb", self.metadatautils.get_imdbtvdb_id, details["title"], content_type,
+                      details["year"], details["imdbnumber"], details["tvshowtitle"])
+        results = {}
+        if uses("directors"):
+            results["directors"] = self.get_directors_writers(details["director"], details["writer"])
+        if uses("duration"):
+            results["duration"] = self.metadatautils.get_duration(details["duration"])
+        if uses("genres"):
+            results["genres"] = self.get_genres(details["genre"])
+
+        # publish the local results as soon as each stage is available, only the differences are written
+        published = []
+
+        def publish_local(name=None):
+            '''publish the details collected so far if the listitem still has the focus'''
+            if cur_listitem == self.last_listitem:
+                if self.pending_flush == cur_listitem:
+                    self.pending_flush = None
+                self.set_win_props(prepare_win_props(self.merge_video_details(details, results)))
+                published.append(name)
+
+        if not self.wait_for_stages(stages, results, LOCAL_STAGES, start, cancelled, publish_local):
+            return None, False
+        if not published:
+            publish_local()
+
+        # the remote providers need the imdb id
+        if not uses(*remote_groups):
+            return self.merge_video_details(details, results), all(name in results for name in stages)
+        if not self.wait_for_stages(stages, results, ["imdbtvdb"], start, cancelled):
+            return None, False
+        imdb_id, tvdb_id = results.get("imdbtvdb") or (details["imdbnumber"], "")
+        # extended art needs the tmdb id from omdb or tmdb
+        extendedart = self.enable_extendedart and uses("extendedart")
+        if uses("omdb") or extendedart:
+            run_stage("omdb", self.metadatautils.get_omdb_info, imdb_id)
+        if uses("top250"):
+            run_stage("top250", self.metadatautils.get_top250_rating, imdb_id)
+        # tvshows-only properties (tvdb)
+        if content_type in ["tvshows", "seasons", "episodes"] and uses("tvdb"):
+            run_stage("tvdb", self.metadatautils.get_tvdb_details, imdb_id, tvdb_id)
+        # movies-only properties (tmdb, animated art)
+        if content_type in ["movies", "setmovies"]:
+            if uses("tmdb") or extendedart:
+                run_stage("tmdb", self.metadatautils.get_tmdb_details, imdb_id)
+            if imdb_id and self.enable_animatedart and uses("animatedart"):
+                run_stage("animatedart", self.metadatautils.get_animated_artwork, imdb_id)
+        if extendedart:
+            if not self.wait_for_stages(stages, results, ["omdb", "tmdb"], start, cancelled):
+                return None, False
+            tmdb_id = self.merge_video_details(details, results).get("tmdb_id", "")
+            run_stage("extendedart", self.metadatautils.get_extended_artwork,
+                      imdb_id, tvdb_id, tmdb_id, content_type)
+        if not self.wait_for_stages(stages, results, stages.keys(), start, cancelled):
+            return None, False
+        return self.merge_video_details(details, results), all(name in results for name in stages)
+
+    @staticmethod
+    def wait_for_stages(stages, results, names, start, cancelled, on_result=None):
+        '''
+            wait for the given stages untill their deadline, on_result is called with the name of a stage
+            as soon as its result is available. returns False if the lookup got cancelled
+        '''
+        pending = [name for name in names if stages.get(name) and name not in results]
+        while pending and not cancelled():
+            for name in list(pending):
+                stage = stages[name]
+                if stage.done:
+                    pending.remove(name)
+                    if stage.result is not None:
+                        results[name] = stage.result
+                        if on_result:
+                            on_result(name)
+                elif time.time() >= start + STAGE_DEADLINES[name]:
+                    log_msg("ListItemMonitor - stage %s did not finish in time" % name)
+                    pending.remove(name)
+            if pending:
+                # wake up for the first stage that finishes, or the nearest deadline
+                deadline = min(start + STAGE_DEADLINES[name] for name in pending)
+                stages[pending[0]].wait(min(0.05, max(deadline - time.time(), 0)))
+        return not cancelled()
+
+    def merge_video_details(self, details, results):
+        '''merge the results of the provider stages in a fixed order, the first found value wins'''
+        details = dict(details)
+        if results.get("imdbtvdb"):
+            details["imdbnumber"] = results["imdbtvdb"][0]
+        details = merge_dict(details, results.get("directors"))
+        for name in ["extrafanart", "extraposter"]:
+            if results.get(name):
+                details["art"] = merge_dict(details["art"], results[name]["art"])
+        for name in ["duration", "genres", "studiologo", "omdb", "streamdetails", "top250", "tvdb", "tmdb"]:
+            if name in results:
+                details = merge_dict(details, results[name])
+        if "animatedart" in results:
+            details = self.metadatautils.extend_dict(details, results["animatedart"])
+        if "extendedart" in results:
+            details = self.metadatautils.extend_dict(details, results["extendedart"], [
+                "posters", "clearlogos", "banners", "discarts", "cleararts", "characterarts"])
+        return details
 
     def delayed_flush(self, cur_listitem):
         '''flushes existing properties when it takes too long to grab the new ones'''
-        xbmc.sleep(500)
-        if cur_listitem == self.last_listitem and cur_listitem in self.lookup_busy:
-            self.reset_win_props()
+        if self.pending_flush == cur_listitem:
+            self.pending_flush = None
+            if cur_listitem == self.last_listitem and cur_listitem in self.lookup_busy:
+                self.reset_win_props()
 
     def do_background_work(self):
         '''stuff that's processed in the background'''
@@ -407,8 +663,14 @@ class ListItemMonitor(threading.Thread):
             if self.exit:
                 return
             log_msg("Started Background worker...")
-            self.set_generic_props()
-            self.listitem_details = {}
+            self.library_stats.check_pvr_and_favourites()
+            log_msg("ListItemMonitor - listitem cache stats: %s" % self.listitem_details.stats())
+            log_msg("ListItemMonitor - window properties stats: %s" % self.win_props.stats())
+            log_msg("ListItemMonitor - poller stats: %s" % self.poller.stats())
+            log_msg("ListItemMonitor - listitem store hits: %s misses: %s" %
+                    (self.listitem_store.hits, self.listitem_store.misses))
+            self.metadatautils.negative_cache.purge_expired()
+            log_msg("ListItemMonitor - negative cache stats: %s" % self.metadatautils.negative_cache.stats())
             if self.exit:
                 return
             self.cache.check_cleanup()
@@ -416,76 +678,22 @@ class ListItemMonitor(threading.Thread):
         except Exception as exc:
             log_exception(__name__, exc)
 
-    def set_generic_props(self):
-        '''set some generic window props with item counts'''
-        # GET TOTAL ADDONS COUNT
-        addons_count = len(kodi_json('Addons.GetAddons'))
-        self.win.setProperty("SkinHelper.TotalAddons", "%s" % addons_count)
-
-        addontypes = []
-        addontypes.append(("executable", "SkinHelper.TotalProgramAddons"))
-        addontypes.append(("video", "SkinHelper.TotalVideoAddons"))
-        addontypes.append(("audio", "SkinHelper.TotalAudioAddons"))
-        addontypes.append(("image", "SkinHelper.TotalPicturesAddons"))
-        for addontype in addontypes:
-            media_array = kodi_json('Addons.GetAddons', {"content": addontype[0]})
-            self.win.setProperty(addontype[1], str(len(media_array)))
-
-        # GET FAVOURITES COUNT
-        favs = kodi_json('Favourites.GetFavourites')
-        if favs:
-            self.win.setProperty("SkinHelper.TotalFavourites", "%s" % len(favs))
-            
-        if self.exit:
-            return
-
-        # GET TV CHANNELS COUNT
-        if getCondVisibility("Pvr.HasTVChannels"):
-            tv_channels = kodi_json('PVR.GetChannels', {"channelgroupid": "alltv"})
-            self.win.setProperty("SkinHelper.TotalTVChannels", "%s" % len(tv_channels))
-            
-        if self.exit:
-            return
-
-        # GET MOVIE SETS COUNT
-        movieset_movies_count = 0
-        moviesets = kodi_json('VideoLibrary.GetMovieSets')
-        for item in moviesets:
-            for item in kodi_json('VideoLibrary.GetMovieSetDetails', {"setid": item["setid"]}):
-                movieset_movies_count += 1
-        self.win.setProperty("SkinHelper.TotalMovieSets", "%s" % len(moviesets))
-        self.win.setProperty("SkinHelper.TotalMoviesInSets", "%s" % movieset_movies_count)
-        
-        if self.exit:
-            return
-
-        # GET RADIO CHANNELS COUNT
-        if getCondVisibility("Pvr.HasRadioChannels"):
-            radio_channels = kodi_json('PVR.GetChannels', {"channelgroupid": "allradio"})
-            self.win.setProperty("SkinHelper.TotalRadioChannels", "%s" % len(radio_channels))
+    def switch_win_props(self, double_buffer):
+        '''switch between writing the listitem properties directly or double buffered'''
+        if double_buffer:
+            self.win_props.clear()
+            self.win_props = DoubleBufferedProperties(self.win, u"SkinHelper.ListItem.")
+        else:
+            self.win_props.clear_all()
+            self.win_props = WindowProperties(self.win)
 
     def reset_win_props(self):
         '''reset all window props set by the script...'''
-        self.metadatautils.process_method_on_list(self.win.clearProperty, self.all_window_props.iterkeys())
-        self.all_window_props = {}
-
-    def set_win_prop(self, prop_tuple):
-        '''sets a window property based on the given key-value'''
-        key = prop_tuple[0]
-        value = prop_tuple[1]
-        if (key not in self.all_window_props) or (key in self.all_window_props and self.all_window_props[key] != value):
-            self.all_window_props[key] = value
-            self.win.setProperty(key, value)
+        self.win_props.clear()
 
     def set_win_props(self, prop_tuples):
-        '''set multiple window properties from list of tuples'''
-        self.metadatautils.process_method_on_list(self.set_win_prop, prop_tuples)
-        # cleanup remaining properties
-        new_keys = [item[0] for item in prop_tuples]
-        for key, value in self.all_window_props.iteritems():
-            if value and key not in new_keys:
-                self.all_window_props[key] = ""
-                self.win.clearProperty(key)
+        '''set multiple window properties from list of tuples, any remaining properties are cleared'''
+        self.win_props.set_props(prop_tuples)
 
     def set_content_header(self, content_type):
         '''sets a window propery which can be used as headertitle'''
@@ -535,46 +743,50 @@ class ListItemMonitor(threading.Thread):
             'Directors': "[CR]".join(directors),
             'Writers': "[CR]".join(writers)}
 
-    def get_listitem_details(self, content_type, prefix):
-        '''collect all listitem properties/values we need'''
+    def get_listitem_details(self, content_type, li_prefix):
+        '''collect all listitem properties/values we need, returns a tuple of the listitem id and the details'''
         listitem_details = {"art": {}}
 
+        infolabels = list(LISTITEM_ID_PROPS)
+        for prop in LISTITEM_BASIC_PROPS:
+            infolabels += [prop, "Property(%s)" % prop]
+        values = None
+        if self.preload_folder and self.preload_folder == self.last_folder:
+            # the folder is preloaded, we only need to identify the item
+            values = get_infolabels(infolabels + LISTITEM_CONTAINER_PROPS, li_prefix)
+            preloaded = self.library_preload.get(self.get_basic_prop(values, "dbtype"),
+                                                 self.get_basic_prop(values, "dbid"))
+            values = merge_dict(values, preloaded) if preloaded else None
+        if values is None:
+            # read all infolabels we might need at once, this is a lot cheaper than reading them one by one
+            for props in LISTITEM_PROPS.itervalues():
+                infolabels += [prop for prop in props if prop not in infolabels]
+            for prop in LISTITEM_ART_PROPS:
+                infolabels += ["Art(%s)" % prop, "Art(tvshow.%s)" % prop]
+            values = get_infolabels(infolabels, li_prefix)
+
         # basic properties
-        for prop in ["dbtype", "dbid", "imdbnumber"]:
-            propvalue = xbmc.getInfoLabel('$INFO[%sListItem.%s]' % (prefix, prop)).decode('utf-8')
-            if not propvalue or propvalue == "-1":
-                propvalue = xbmc.getInfoLabel('$INFO[%sListItem.Property(%s)]' % (prefix, prop)).decode('utf-8')
-            listitem_details[prop] = propvalue
-
-        # generic properties
-        props = ["label", "title", "filenameandpath", "year", "genre", "path", "folderpath",
-                 "duration", "plot", "plotoutline", "label2", "icon", "thumb"]
-        # properties for media items
+        for prop in LISTITEM_BASIC_PROPS:
+            listitem_details[prop] = self.get_basic_prop(values, prop)
+
+        # prefer listitem's contenttype over container's contenttype
+        if listitem_details["dbtype"]:
+            content_type = listitem_details["dbtype"] + "s"
+
+        # generic properties and the properties for media/music/pvr items
+        props = LISTITEM_PROPS["generic"]
         if content_type in ["movies", "tvshows", "seasons", "episodes", "musicvideos", "setmovies"]:
-            props += ["studio", "tvshowtitle", "premiered", "director", "writer",
-                      "firstaired", "tagline", "rating", "season", "episode"]
-        # properties for music items
+            props = props + LISTITEM_PROPS["media"]
         elif content_type in ["musicvideos", "artists", "albums", "songs"]:
-            props += ["artist", "album", "rating", "albumartist", "discnumber"]
-        # properties for pvr items
+            props = props + LISTITEM_PROPS["music"]
         elif content_type in ["tvchannels", "tvrecordings", "channels", "recordings", "timers", "tvtimers"]:
-            props += ["channel", "channelname"]
-
+            props = props + LISTITEM_PROPS["pvr"]
         for prop in props:
-            if self.exit:
-                break
-            propvalue = xbmc.getInfoLabel('$INFO[%sListItem.%s]' % (prefix, prop)).decode('utf-8')
-            listitem_details[prop] = propvalue
+            listitem_details[prop] = values.get(prop, "")
 
         # artwork properties
-        artprops = ["fanart", "poster", "clearlogo", "clearart",
-                    "landscape", "thumb", "banner", "discart", "characterart"]
-        for prop in artprops:
-            if self.exit:
-                break
-            propvalue = xbmc.getInfoLabel('$INFO[%sListItem.Art(%s)]' % (prefix, prop)).decode('utf-8')
-            if not propvalue:
-                propvalue = xbmc.getInfoLabel('$INFO[%sListItem.Art(tvshow.%s)]' % (prefix, prop)).decode('utf-8')
+        for prop in LISTITEM_ART_PROPS:
+            propvalue = values.get("Art(%s)" % prop) or values.get("Art(tvshow.%s)" % prop)
             if propvalue:
                 listitem_details["art"][prop] = propvalue
 
@@ -586,14 +798,25 @@ class ListItemMonitor(threading.Thread):
             listitem_details["art"]["thumb"] = listitem_details["thumb"]
         if "fanart" not in listitem_details["art"] and "fanart" in listitem_details:
             listitem_details["art"]["fanart"] = listitem_details["fanart"]
-        return listitem_details
+        return self.get_listitem_id(values), listitem_details
+
+    @staticmethod
+    def get_basic_prop(values, prop):
+        '''the basic properties might be set as listitem property instead of infolabel'''
+        propvalue = values[prop]
+        if not propvalue or propvalue == "-1":
+            propvalue = values["Property(%s)" % prop]
+        return propvalue
 
     def get_streamdetails(self, li_dbid, li_path, content_type):
         '''get the streamdetails for the current video'''
         details = {}
         if li_dbid and content_type in ["movies", "episodes",
                                         "musicvideos"] and not li_path.startswith("videodb://movies/sets/"):
-            details = self.metadatautils.get_streamdetails(li_dbid, content_type)
+            # the streamdetails of the items in a preloaded folder are already known
+            details = self.library_preload.get_streamdetails(content_type[:-1], li_dbid)
+            if details is None:
+                details = self.metadatautils.get_streamdetails(li_dbid, content_type)
         return details
 
     def set_forcedview(self, content_type):
@@ -620,20 +843,23 @@ class ListItemMonitor(threading.Thread):
         else:
             self.win.clearProperty("SkinHelper.ForcedView")
 
-    def get_pvr_artwork(self, listitem, prefix):
+    def get_pvr_artwork(self, listitem, li_prefix):
         '''get pvr artwork from artwork module'''
-        if self.enable_pvrart:
-            if getCondVisibility("%sListItem.IsFolder" % prefix) and not listitem[
+        if self.enable_pvrart and self.manifest.uses("pvrart"):
+            if getCondVisibility("%sIsFolder" % li_prefix) and not listitem[
                     "channelname"] and not listitem["title"]:
                 listitem["title"] = listitem["label"]
-            listitem = self.metadatautils.extend_dict(
-                listitem, self.metadatautils.get_pvr_artwork(
+            # the artwork of the airing programs is precomputed in the channel index
+            pvrart = self.channel_index.get_artwork(listitem["title"], listitem["channelname"])
+            if pvrart is None:
+                pvrart = self.metadatautils.get_pvr_artwork(
                     listitem["title"],
                     listitem["channelname"],
-                    listitem["genre"]), ["title", "genre", "genres", "thumb"])
-        # pvr channellogo
-        if listitem["channelname"]:
-            listitem["art"]["ChannelLogo"] = self.metadatautils.get_channellogo(listitem["channelname"])
-        elif listitem.get("pvrchannel"):
-            listitem["art"]["ChannelLogo"] = self.metadatautils.get_channellogo(listitem["pvrchannel"])
+                    listitem["genre"])
+            listitem = self.metadatautils.extend_dict(listitem, pvrart, ["title", "genre", "genres", "thumb"])
+        # pvr channellogo, kodi's own logos are served from the channel index
+        channelname = listitem["channelname"] or listitem.get("pvrchannel")
+        if channelname and self.manifest.uses("channellogo"):
+            listitem["art"]["ChannelLogo"] = self.channel_index.get_logo(channelname=channelname) or \
+                self.metadatautils.get_channellogo(channelname)
         return listitem
@@ -0,0 +1,80 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+    script.skin.helper.service
+    Helper service and scripts for Kodi skins
+    listitem_store.py
+    Persistent storage of the computed listitem properties so they survive a restart of the service
+'''
+
+import hashlib
+import time
+from datetime import timedelta
+from utils import try_encode
+from simplecache import SimpleCache
+
+# bump this when the format of the stored properties changes
+STORE_VERSION = 1
+# the generation of the store is bumped when a library is cleaned, it's kept longer than any stored item
+GENERATION_KEY = u"skinhelper.listitemstore.generation"
+
+
+class ListItemStore(object):
+    '''stores the window props of a listitem on disk, keyed by its dbtype and dbid'''
+
+    def __init__(self):
+        self.cache = SimpleCache()
+        # we have our own memory cache for the listitems
+        self.cache.enable_mem_cache = False
+        self.generation = self.cache.get(GENERATION_KEY) or u""
+        self.settings = u""
+        self.checksum = ""
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        '''cleanup on exit'''
+        self.cache.close()
+
+    def set_version(self, *args):
+        '''the stored items are only valid for the given settings (e.g. the enabled features)'''
+        self.settings = u".".join([u"%s" % arg for arg in args])
+        self.checksum = u"%s.%s.%s" % (STORE_VERSION, self.generation, self.settings)
+
+    def flush(self):
+        '''invalidate all stored items (e.g. after a library clean), also for the next sessions'''
+        self.generation = u"%s" % int(time.time())
+        self.cache.set(GENERATION_KEY, self.generation, expiration=timedelta(days=30))
+        self.checksum = u"%s.%s.%s" % (STORE_VERSION, self.generation, self.settings)
+
+    @staticmethod
+    def get_key(details, content_type):
+        '''library items are stored by their dbtype and dbid, all other items by a hash of their details'''
+        dbid = details.get("dbid")
+        if dbid and dbid != "-1" and details.get("dbtype"):
+            return u"skinhelper.listitem.%s.%s" % (details["dbtype"], dbid)
+        item_hash = hashlib.md5(try_encode(u"%s|%s|%s|%s|%s" % (
+            content_type, details.get("label"), details.get("title"),
+            details.get("year"), details.get("path")))).hexdigest()
+        return u"skinhelper.listitem.%s" % item_hash
+
+    def get(self, details, content_type):
+        '''get the stored window props for the listitem, returns None if not stored'''
+        all_props = self.cache.get(self.get_key(details, content_type), checksum=self.checksum)
+        if all_props:
+            self.hits += 1
+            return all_props
+        self.misses += 1
+        return None
+
+    def set(self, details, content_type, all_props):
+        '''store the window props for the listitem'''
+        is_library_item = details.get("dbid") and details["dbid"] != "-1"
+        self.cache.set(self.get_key(details, content_type), all_props, checksum=self.checksum,
+                       expiration=timedelta(days=14 if is_library_item else 2))
+
+    def delete(self, dbtype, dbid):
+        '''remove the stored window props of a library item'''
+        # simplecache can't delete, overwrite the entry with one that's expired right away
+        self.cache.set(u"skinhelper.listitem.%s.%s" % (dbtype, dbid), None, expiration=timedelta(seconds=0))
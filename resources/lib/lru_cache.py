@@ -0,0 +1,163 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+    script.skin.helper.service
+    Helper service and scripts for Kodi skins
+    lru_cache.py
+    Bounded in-memory cache with LRU eviction, per-entry expiration and tag based invalidation
+'''
+
+import threading
+import time
+from collections import OrderedDict
+
+
+def estimate_size(value):
+    '''rough estimation of the memory footprint (in bytes) of a cached value'''
+    if isinstance(value, (str, unicode)):
+        return len(value)
+    if isinstance(value, (list, tuple, set)):
+        return sum(estimate_size(item) for item in value) + 8 * len(value)
+    if isinstance(value, dict):
+        return sum(estimate_size(key) + estimate_size(item) for key, item in value.iteritems()) + 16 * len(value)
+    return 8
+
+
+class LRUCache(object):
+    '''thread safe memory cache bounded by entry count and (estimated) size in bytes'''
+
+    def __init__(self, max_items=1000, max_bytes=0, ttl=0, sizeof=estimate_size):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.size = 0
+        self._data = OrderedDict()
+        # tag -> keys of the entries with that tag
+        self._tags = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self.get(key, count=False) is not None
+
+    def configure(self, max_items=None, max_bytes=None, ttl=None):
+        '''adjust the budget of the cache, evicts entries if the new budget is smaller'''
+        with self._lock:
+            if max_items is not None:
+                self.max_items = max_items
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            if ttl is not None:
+                self.ttl = ttl
+            self._enforce_budget()
+
+    def get(self, key, default=None, count=True):
+        '''get the value for key and mark it as most recently used'''
+        with self._lock:
+            entry = self._data.get(key)
+            if entry and entry[1] and entry[1] < time.time():
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                if count:
+                    self.misses += 1
+                return default
+            # move to the end of the ordered dict (most recently used)
+            del self._data[key]
+            self._data[key] = entry
+            if count:
+                self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, ttl=None, tags=None):
+        '''store value for key, evicting least recently used entries if needed'''
+        if ttl is None:
+            ttl = self.ttl
+        expires = time.time() + ttl if ttl else 0
+        size = self.sizeof(value)
+        tags = tuple(tags) if tags else ()
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, expires, size, tags)
+            self.size += size
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            self._enforce_budget()
+
+    def pop(self, key, default=None):
+        '''remove key from the cache and return its value'''
+        with self._lock:
+            if key in self._data:
+                return self._remove(key)[0]
+            return default
+
+    def clear(self):
+        '''remove all entries from the cache'''
+        with self._lock:
+            self._data.clear()
+            self._tags.clear()
+            self.size = 0
+
+    def invalidate(self, tag):
+        '''remove all entries with the given tag, returns the keys of the removed entries'''
+        with self._lock:
+            keys = list(self._tags.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+        return keys
+
+    def purge_expired(self):
+        '''remove all entries of which the ttl has passed, returns the number of removed entries'''
+        now = time.time()
+        with self._lock:
+            expired = [key for key, entry in self._data.iteritems() if entry[1] and entry[1] < now]
+            for key in expired:
+                self._remove(key)
+            self.expirations += len(expired)
+        return len(expired)
+
+    def stats(self):
+        '''return a dict with the cache counters'''
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "items": len(self._data),
+                "bytes": self.size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "hitratio": float(self.hits) / lookups if lookups else 0.0
+            }
+
+    def _remove(self, key):
+        '''remove an entry, lock must be held by the caller'''
+        entry = self._data.pop(key)
+        self.size -= entry[2]
+        for tag in entry[3]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        return entry
+
+    def _enforce_budget(self):
+        '''evict least recently used entries untill we're within budget, lock must be held by the caller'''
+        while self._data and ((self.max_items and len(self._data) > self.max_items) or
+                              (self.max_bytes and self.size > self.max_bytes)):
+            self._remove(next(iter(self._data)))
+            self.evictions += 1
@@ -15,7 +15,8 @@ import xbmcaddon
 from skinsettings import SkinSettings
 from simplecache import SimpleCache
 from utils import log_msg, KODI_VERSION, kodi_json, clean_string, getCondVisibility
-from utils import log_exception, get_current_content_type, ADDON_ID, recursive_delete_dir
+from utils import log_exception, ADDON_ID, recursive_delete_dir
+from content_types import get_current_content_type
 from dialogselect import DialogSelect
 from xml.dom.minidom import parse
 from metadatautils import MetadataUtils
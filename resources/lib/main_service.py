@@ -8,17 +8,27 @@
     Background service running the various threads
 '''
 
-from utils import log_msg, ADDON_ID, log_exception
+from utils import log_msg, ADDON_ID, log_exception, getCondVisibility, get_skin_int
 from skinsettings import SkinSettings
 from listitem_monitor import ListItemMonitor
 from kodi_monitor import KodiMonitor
 from webservice import WebService
+from library_stats import LibraryStats
+from metrics import Metrics
+from scheduler import Scheduler
+from property_manifest import PropertyManifest
+from invalidation_bus import InvalidationBus
+from channel_index import ChannelIndex
 from metadatautils import MetadataUtils
+from metadata_proxy import MetadataProxy
 import xbmc
 import xbmcaddon
 import xbmcgui
 
 
+STATS_FILE = "special://profile/addon_data/%s/stats.json" % ADDON_ID
+
+
 class MainService:
     '''our main background service running the various threads'''
     last_skin = ""
@@ -26,12 +36,32 @@ class MainService:
     def __init__(self):
         self.win = xbmcgui.Window(10000)
         self.addon = xbmcaddon.Addon(ADDON_ID)
-        self.metadatautils = MetadataUtils()
+        self.metrics = Metrics()
+        # all threads share the metadatautils instance through a proxy which remembers the failed lookups
+        self.metadatautils = MetadataProxy(MetadataUtils(), self.metrics)
         self.addonname = self.addon.getAddonInfo('name').decode("utf-8")
         self.addonversion = self.addon.getAddonInfo('version').decode("utf-8")
-        self.kodimonitor = KodiMonitor(metadatautils=self.metadatautils, win=self.win)
+        self.library_stats = LibraryStats(self.win)
+        # the property groups the skin uses
+        self.manifest = PropertyManifest()
+        self.manifest.load()
+        # the library notifications are translated into evictions of the cached items
+        self.invalidation = InvalidationBus()
+        self.metrics.gauge("invalidation", self.invalidation.stats)
+        # the pvr channels with their logos and the artwork of the airing programs
+        self.channel_index = ChannelIndex()
+        self.metrics.gauge("pvrindex", self.channel_index.stats)
+        # all periodic and deferred tasks of the service run on this scheduler
+        self.scheduler = Scheduler(self.metrics)
+        self.scheduler.start()
+        self.kodimonitor = KodiMonitor(
+            metadatautils=self.metadatautils, win=self.win, library_stats=self.library_stats,
+            metrics=self.metrics, scheduler=self.scheduler, manifest=self.manifest,
+            invalidation=self.invalidation, channel_index=self.channel_index)
         self.listitem_monitor = ListItemMonitor(
-            metadatautils=self.metadatautils, win=self.win, monitor=self.kodimonitor)
+            metadatautils=self.metadatautils, win=self.win, monitor=self.kodimonitor,
+            library_stats=self.library_stats, metrics=self.metrics, scheduler=self.scheduler,
+            manifest=self.manifest, invalidation=self.invalidation, channel_index=self.channel_index)
         self.webservice = WebService(self.metadatautils)
         self.win.clearProperty("SkinHelperShutdownRequested")
 
@@ -41,13 +71,15 @@ class MainService:
         
         log_msg('%s version %s started' % (self.addonname, self.addonversion), xbmc.LOGNOTICE)
 
-        # run as service, check skin every 10 seconds and keep the other threads alive
-        while not self.kodimonitor.abortRequested():
-
-            # check skin version info
-            self.check_skin_version()
+        # check skin every 10 seconds and publish the collected timings as window props and json file
+        self.scheduler.schedule(
+            "service.skinversion", self.check_skin_version, interval=10, delay=0, background=True)
+        self.scheduler.schedule("service.metrics", self.publish_metrics, interval=10)
+        # the pvr index is built as soon as the pvr channels are available
+        self.scheduler.schedule("service.pvrindex", self.build_pvr_index, interval=30, delay=5, background=True)
 
-            # sleep for 10 seconds
+        # run as service and keep the other threads alive
+        while not self.kodimonitor.abortRequested():
             self.kodimonitor.waitForAbort(10)
 
         # Abort was requested while waiting. We should exit
@@ -59,6 +91,8 @@ class MainService:
         self.win.setProperty("SkinHelperShutdownRequested", "shutdown")
         log_msg('Shutdown requested !', xbmc.LOGNOTICE)
         self.listitem_monitor.stop()
+        self.kodimonitor.close()
+        self.scheduler.stop()
         self.metadatautils.close()
         del self.win
         del self.kodimonitor
@@ -66,6 +100,29 @@ class MainService:
         #del self.webservice
         log_msg('%s version %s stopped' % (self.addonname, self.addonversion), xbmc.LOGNOTICE)
 
+    def publish_metrics(self):
+        '''publish the timings as SkinHelper.Stats.* window props and dump them to a json file'''
+        self.metrics.publish(self.win)
+        self.metrics.dump(STATS_FILE)
+
+    def build_pvr_index(self):
+        '''(re)build the channel index when the pvr is available'''
+        if not getCondVisibility("PVR.HasTVChannels") or not self.channel_index.build_due():
+            return
+        precompute_limit = 0
+        if getCondVisibility("Skin.HasSetting(SkinHelper.EnablePVRThumbs)") and self.manifest.uses("pvrart"):
+            precompute_limit = get_skin_int("SkinHelper.PVR.PrecomputeLimit", 50)
+        if self.channel_index.build(precompute_limit, get_skin_int("SkinHelper.PVR.PrecomputeWindow", 120) * 60):
+            # the artwork is precomputed in small chunks so the other background tasks are not held up
+            self.scheduler.schedule(
+                "service.pvrprecompute", self.precompute_pvr_artwork, interval=1, delay=0, background=True)
+
+    def precompute_pvr_artwork(self):
+        '''precompute the pvr artwork of the next programs in the channel index, stops when all are done'''
+        if self.kodimonitor.abortRequested():
+            return False
+        return self.channel_index.precompute(self.metadatautils)
+
     def check_skin_version(self):
         '''check if skin changed'''
         try:
@@ -78,6 +135,7 @@ class MainService:
             if self.last_skin != this_skin:
                 # auto correct skin settings if needed
                 self.last_skin = this_skin
+                self.manifest.load()
                 self.win.setProperty("SkinHelper.skinTitle", "%s - %s: %s"
                                      % (skin_label, xbmc.getLocalizedString(19114), skin_version))
                 self.win.setProperty("SkinHelper.skin_version", "%s: %s"
@@ -0,0 +1,124 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+    script.skin.helper.service
+    Helper service and scripts for Kodi skins
+    metadata_proxy.py
+    Wrapper around the shared MetadataUtils instance which remembers the lookups that found nothing
+    and lets concurrent identical lookups share a single computation
+'''
+
+import copy
+import threading
+from functools import partial
+from lru_cache import LRUCache
+
+# lookups of which an empty result is remembered, with the test if a result is empty
+NEGATIVE_CACHED = {
+    "get_imdbtvdb_id": lambda result: not result or not any(result),
+    "get_omdb_info": lambda result: not result
+}
+
+# lookups which are shared by concurrent callers with the same arguments
+COALESCED = ["get_imdbtvdb_id", "get_omdb_info", "get_tmdb_details", "get_tvdb_details", "get_top250_rating",
+             "get_extended_artwork", "get_animated_artwork", "get_music_artwork", "get_pvr_artwork",
+             "get_streamdetails", "get_moviesetdetails", "get_channellogo", "get_studio_logo",
+             "get_extrafanart", "get_extraposter"]
+# seconds to wait for the result of a lookup in progress by another thread
+COALESCE_TIMEOUT = 30
+
+
+def normalize_args(args, kwargs):
+    '''build a hashable key of the arguments, strings are compared case insensitive'''
+    def normalize(value):
+        '''normalize a single value'''
+        if isinstance(value, basestring):
+            return value.strip().lower()
+        if isinstance(value, (list, tuple)):
+            return tuple(normalize(item) for item in value)
+        if isinstance(value, dict):
+            return tuple(sorted((key, normalize(item)) for key, item in value.iteritems()))
+        return value
+    return normalize(args), normalize(kwargs)
+
+
+class Flight(object):
+    '''a lookup in progress, other callers wait for its result'''
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.failed = True
+
+
+class MetadataProxy(object):
+    '''
+        behaves like MetadataUtils, empty results of the remote id/omdb lookups are cached for a short time
+        and identical lookups which are requested at the same time are only executed once
+    '''
+
+    def __init__(self, metadatautils, metrics=None):
+        self.__dict__["_mutils"] = metadatautils
+        self.__dict__["_metrics"] = metrics
+        self.__dict__["negative_cache"] = LRUCache(max_items=2000, ttl=3600)
+        self.__dict__["_flights"] = {}
+        self.__dict__["_flights_lock"] = threading.Lock()
+
+    def __getattr__(self, name):
+        attr = getattr(self._mutils, name)
+        if name in NEGATIVE_CACHED:
+            return partial(self._negative_cached, name, partial(self._single_flight, name, attr))
+        if name in COALESCED:
+            return partial(self._single_flight, name, attr)
+        return attr
+
+    def __setattr__(self, name, value):
+        # settings like the studiologos path must end up in the wrapped instance
+        setattr(self._mutils, name, value)
+
+    def configure_negative_cache(self, max_items, ttl):
+        '''set the bounds of the negative cache'''
+        self.negative_cache.configure(max_items=max_items, ttl=ttl)
+
+    def _negative_cached(self, name, func, *args, **kwargs):
+        '''call the lookup unless it's known that it will not find anything'''
+        if kwargs.get("ignore_cache"):
+            return func(*args, **kwargs)
+        key = (name, normalize_args(args, kwargs))
+        result = self.negative_cache.get(key)
+        if self._metrics:
+            self._metrics.hit("negative.%s" % name, result is not None)
+        if result is not None:
+            return copy.copy(result)
+        result = func(*args, **kwargs)
+        if NEGATIVE_CACHED[name](result):
+            self.negative_cache.set(key, result)
+        return result
+
+    def _single_flight(self, name, func, *args, **kwargs):
+        '''execute the lookup or wait for the identical lookup which is already in progress'''
+        if kwargs.get("ignore_cache"):
+            return func(*args, **kwargs)
+        key = (name, normalize_args(args, kwargs))
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = Flight()
+                self._flights[key] = flight
+        if self._metrics:
+            self._metrics.hit("coalesced.%s" % name, not is_leader)
+        if not is_leader:
+            # the result is shared, make sure the callers can't modify each other's copy
+            if flight.event.wait(COALESCE_TIMEOUT) and not flight.failed:
+                return copy.deepcopy(flight.result)
+            return func(*args, **kwargs)
+        try:
+            flight.result = func(*args, **kwargs)
+            flight.failed = False
+            return flight.result
+        finally:
+            with self._flights_lock:
+                self._flights.pop(key, None)
+            flight.event.set()
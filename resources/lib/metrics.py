@@ -0,0 +1,134 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+    script.skin.helper.service
+    Helper service and scripts for Kodi skins
+    metrics.py
+    Rolling latency histograms and counters of the service, published as window properties
+'''
+
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from utils import json, log_exception
+import xbmcvfs
+
+# number of samples kept per metric
+WINDOW_SIZE = 200
+
+
+def percentile(samples, pct):
+    '''nearest rank percentile of a sorted list'''
+    if not samples:
+        return 0
+    return samples[max(0, int(math.ceil(pct / 100.0 * len(samples))) - 1)]
+
+
+class Metrics(object):
+    '''collects the duration of named stages and hit/miss counters'''
+
+    def __init__(self, window_size=WINDOW_SIZE):
+        self.window_size = window_size
+        self.changed = False
+        self.last_dump = 0
+        self._samples = {}
+        self._counts = {}
+        self._ratios = {}
+        self._gauges = {}
+        self._published = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name):
+        '''time the enclosed block'''
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.record(name, time.time() - start)
+
+    def timed(self, name, func):
+        '''returns a wrapper for the function which times every call'''
+        def wrapper(*args, **kwargs):
+            '''time the call of the wrapped function'''
+            with self.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def record(self, name, duration):
+        '''add a duration (in seconds) to the histogram of the metric'''
+        with self._lock:
+            if name not in self._samples:
+                self._samples[name] = deque(maxlen=self.window_size)
+                self._counts[name] = 0
+            self._samples[name].append(duration * 1000)
+            self._counts[name] += 1
+            self.changed = True
+
+    def hit(self, name, is_hit):
+        '''count a hit or miss of a cache'''
+        with self._lock:
+            hits, misses = self._ratios.get(name, (0, 0))
+            self._ratios[name] = (hits + 1, misses) if is_hit else (hits, misses + 1)
+            self.changed = True
+
+    def gauge(self, name, func):
+        '''register a function which returns a dict with the current values of a component'''
+        with self._lock:
+            self._gauges[name] = func
+
+    def summary(self):
+        '''returns a dict with the percentiles (in ms) per metric and the hit ratio per cache'''
+        with self._lock:
+            samples = dict((name, sorted(values)) for name, values in self._samples.iteritems())
+            counts = dict(self._counts)
+            ratios = dict(self._ratios)
+            gauges = dict(self._gauges)
+        result = {}
+        for name, values in samples.iteritems():
+            result[name] = {
+                "count": counts[name],
+                "p50": int(percentile(values, 50)),
+                "p95": int(percentile(values, 95)),
+                "p99": int(percentile(values, 99)),
+                "max": int(values[-1]) if values else 0
+            }
+        for name, (hits, misses) in ratios.iteritems():
+            result[name] = {
+                "hits": hits,
+                "misses": misses,
+                "hitratio": int(100 * hits / (hits + misses)) if hits + misses else 0
+            }
+        for name, func in gauges.iteritems():
+            result[name] = func()
+        return result
+
+    def publish(self, win):
+        '''set the SkinHelper.Stats.<metric>.<value> window props, only the changed values are written'''
+        for name, values in self.summary().iteritems():
+            for key, value in values.iteritems():
+                prop = "SkinHelper.Stats.%s.%s" % (name, key)
+                value = "%s" % value
+                if self._published.get(prop) != value:
+                    self._published[prop] = value
+                    win.setProperty(prop, value)
+
+    def dump(self, filename, interval=60):
+        '''write the metrics to a json file, rate limited to spare the storage of low end devices'''
+        if not self.changed or time.time() - self.last_dump < interval:
+            return
+        self.changed = False
+        self.last_dump = time.time()
+        try:
+            # the addon_data folder does not exist untill something is stored in it
+            folder = filename.rsplit("/", 1)[0] + "/"
+            if not xbmcvfs.exists(folder):
+                xbmcvfs.mkdirs(folder)
+            statsfile = xbmcvfs.File(filename, "w")
+            statsfile.write(json.dumps(self.summary(), indent=2, sort_keys=True))
+            statsfile.close()
+        except Exception as exc:
+            log_exception(__name__, exc)
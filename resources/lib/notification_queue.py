@@ -0,0 +1,112 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+    script.skin.helper.service
+    Helper service and scripts for Kodi skins
+    notification_queue.py
+    Queue for the kodi notifications so they're processed outside of kodi's callback thread
+'''
+
+from utils import json, log_exception
+from worker_pool import WorkerPool, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+from scheduler import monotonic
+
+# the kinds of events with the pool that processes them and their priority within that pool,
+# the player has its own worker so a library scan can never delay the playback handling
+CATEGORY_PLAYER = "player"
+CATEGORY_LIBRARY = "library"
+CATEGORY_SYSTEM = "system"
+CATEGORIES = {
+    CATEGORY_PLAYER: ("player", PRIORITY_HIGH),
+    CATEGORY_SYSTEM: ("player", PRIORITY_NORMAL),
+    CATEGORY_LIBRARY: ("library", PRIORITY_LOW)
+}
+
+
+class NotificationEvent(object):
+    '''a parsed kodi notification'''
+    __slots__ = ["sender", "method", "category", "mediatype", "dbid", "transaction", "received", "settled"]
+
+    def __init__(self, sender, method, mediatype="", dbid=0, transaction=False):
+        self.sender = sender
+        self.method = method
+        self.mediatype = mediatype
+        self.dbid = dbid
+        self.transaction = transaction
+        self.received = monotonic()
+        # the event was postponed untill the playback settled (e.g. channel surfing)
+        self.settled = False
+        if method.startswith("Player."):
+            self.category = CATEGORY_PLAYER
+        elif method.startswith("VideoLibrary.") or method.startswith("AudioLibrary."):
+            self.category = CATEGORY_LIBRARY
+        else:
+            self.category = CATEGORY_SYSTEM
+
+    @classmethod
+    def parse(cls, sender, method, data):
+        '''build the event from the arguments of xbmc.Monitor.onNotification'''
+        data = json.loads(data.decode('utf-8'))
+        mediatype = ""
+        dbid = 0
+        transaction = False
+        if data and isinstance(data, dict):
+            if data.get("item"):
+                mediatype = data["item"].get("type", "")
+                dbid = data["item"].get("id", 0)
+            elif data.get("type"):
+                mediatype = data["type"]
+                dbid = data.get("id", 0)
+            if data.get("transaction"):
+                transaction = True
+        return cls(sender, method, mediatype, dbid, transaction)
+
+
+class NotificationQueue(object):
+    '''dispatches the events to the handler on a dedicated worker per pool, in order of priority'''
+
+    def __init__(self, handler, metrics):
+        self.handler = handler
+        self.metrics = metrics
+        self.processed = 0
+        self.pools = {}
+        for pool_name, _ in CATEGORIES.itervalues():
+            if pool_name not in self.pools:
+                self.pools[pool_name] = WorkerPool(num_workers=1, name="Notifications-%s" % pool_name)
+        self.metrics.gauge("notifications", self.stats)
+
+    def start(self):
+        '''start the workers'''
+        for pool in self.pools.itervalues():
+            pool.start()
+
+    def stop(self):
+        '''stop the workers, pending events are discarded'''
+        for pool in self.pools.itervalues():
+            pool.stop()
+
+    def put(self, event):
+        '''queue an event for processing'''
+        pool_name, priority = CATEGORIES[event.category]
+        self.pools[pool_name].submit(self._process, (event,), priority=priority)
+
+    def pending(self, category):
+        '''number of queued events that are processed by the same worker as the category'''
+        return self.pools[CATEGORIES[category][0]].qsize()
+
+    def _process(self, event):
+        '''run the handler for the event and keep track of the time it waited in the queue'''
+        self.metrics.record("notifications.%s.lag" % event.category, monotonic() - event.received)
+        try:
+            with self.metrics.span("notifications.%s" % event.category):
+                self.handler(event)
+        except Exception as exc:
+            log_exception(__name__, exc)
+        self.processed += 1
+
+    def stats(self):
+        '''return a dict with the queue depth per pool'''
+        result = dict(("%s.depth" % name, pool.qsize()) for name, pool in self.pools.iteritems())
+        result["processed"] = self.processed
+        return result
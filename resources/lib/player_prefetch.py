@@ -0,0 +1,83 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+    script.skin.helper.service
+    Helper service and scripts for Kodi skins
+    player_prefetch.py
+    Keeps the precomputed player properties of the upcoming playlist items
+'''
+
+from utils import kodi_json, getCondVisibility
+from lru_cache import LRUCache
+import xbmc
+
+# the fields of the playlist items we need to compute the player properties
+PLAYLIST_PROPS = ["title", "year", "imdbnumber", "showtitle", "artist", "album", "disc", "comment"]
+# the ids of kodi's music and video playlists
+PLAYLISTS = {"music": 0, "video": 1}
+
+
+def library_key(mediatype, dbid):
+    '''cache key of a library item'''
+    return u"%s.%s" % (mediatype, dbid)
+
+
+def video_key(title, year, showtitle):
+    '''cache key of a video by its labels'''
+    return u"video|%s|%s|%s" % (title.lower(), year, showtitle.lower())
+
+
+def music_key(artist, album, title):
+    '''cache key of a song by its labels'''
+    return u"music|%s|%s|%s" % (artist.lower(), album.lower(), title.lower())
+
+
+class PlayerPrefetch(object):
+    '''the player properties of the next playlist items are computed while the current item plays'''
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self.cache = LRUCache(max_items=20, ttl=7200)
+
+    def get(self, key):
+        '''get the prefetched properties, returns None if the item was not prefetched'''
+        all_props = self.cache.get(key)
+        self.metrics.hit("player.prefetch", all_props is not None)
+        return all_props
+
+    def set(self, keys, all_props, library, mediatype="", dbid=0):
+        '''
+            store the properties of a prefetched item under all its keys, tagged like the listitem caches
+            so the item is evicted when it changes in the library
+        '''
+        tags = [u"library.%s" % library]
+        if dbid:
+            tags.append(library_key(mediatype, dbid))
+        for key in keys:
+            self.cache.set(key, all_props, tags=tags)
+
+    def invalidate(self, library, dbtype, dbid):
+        '''evict a changed library item (or the whole library), subscriber of the invalidation bus'''
+        if dbtype:
+            self.cache.invalidate(library_key(dbtype, dbid))
+        else:
+            self.cache.invalidate(u"library.%s" % library)
+
+    @staticmethod
+    def get_upcoming(count):
+        '''returns the type of the active playlist and its next items'''
+        playlist = "music" if getCondVisibility("Player.HasAudio") else "video"
+        try:
+            # the position infolabel starts at 1, the playlist items at 0
+            position = int(xbmc.getInfoLabel("Playlist.Position(%s)" % playlist))
+        except ValueError:
+            return playlist, []
+        if count < 1 or position < 1:
+            return playlist, []
+        params = {
+            "playlistid": PLAYLISTS[playlist],
+            "properties": PLAYLIST_PROPS,
+            "limits": {"start": position, "end": position + count}
+        }
+        return playlist, kodi_json("Playlist.GetItems", params, "items")
@@ -0,0 +1,61 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+    script.skin.helper.service
+    Helper service and scripts for Kodi skins
+    property_manifest.py
+    The property groups the skin declares to use, lookups for the other groups are skipped
+'''
+
+from xml.dom.minidom import parse
+from utils import log_msg, log_exception, try_decode
+import xbmc
+import xbmcvfs
+
+MANIFEST_FILE = "special://skin/extras/skinhelper_properties.xml"
+
+# all groups of properties the service can provide
+PROPERTY_GROUPS = ["directors", "genres", "duration", "studiologo", "streamdetails", "extrafanart", "extraposter",
+                   "omdb", "top250", "tvdb", "tmdb", "animatedart", "extendedart", "musicart", "pvrart",
+                   "channellogo"]
+
+
+class PropertyManifest(object):
+    '''
+        skins can ship extras/skinhelper_properties.xml with the property groups they use, e.g.
+        <skinhelper_properties><group>omdb</group><group>studiologo</group></skinhelper_properties>
+        without a manifest all groups are used
+    '''
+
+    def __init__(self):
+        self.groups = None
+
+    @property
+    def checksum(self):
+        '''identifies the set of used groups, e.g. for stored properties'''
+        return "all" if self.groups is None else ",".join(sorted(self.groups))
+
+    def load(self):
+        '''read the manifest of the current skin'''
+        self.groups = None
+        manifest_file = xbmc.translatePath(MANIFEST_FILE).decode("utf-8")
+        if not xbmcvfs.exists(manifest_file):
+            return
+        try:
+            doc = parse(manifest_file)
+            groups = set()
+            for item in doc.documentElement.getElementsByTagName('group'):
+                group = try_decode(item.firstChild.nodeValue).strip().lower() if item.firstChild else ""
+                if group in PROPERTY_GROUPS:
+                    groups.add(group)
+                else:
+                    log_msg("PropertyManifest - unknown property group: %s" % group, xbmc.LOGWARNING)
+            self.groups = groups
+            log_msg("PropertyManifest - skin uses the property groups: %s" % self.checksum)
+        except Exception as exc:
+            log_exception(__name__, exc)
+
+    def uses(self, *groups):
+        '''returns True if the skin uses any of the given groups'''
+        return self.groups is None or any(group in self.groups for group in groups)
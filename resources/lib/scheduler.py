@@ -0,0 +1,218 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+    script.skin.helper.service
+    Helper service and scripts for Kodi skins
+    scheduler.py
+    Single timer thread which runs all periodic and deferred tasks of the service
+'''
+
+import heapq
+import itertools
+import random
+import threading
+import time
+from utils import log_msg, log_exception
+from worker_pool import WorkerPool
+import xbmc
+
+# inline tasks should be quick, we log the ones that take longer than this (seconds)
+SLOW_TASK = 0.5
+# the alarm thread sleeps in slices of at most this many seconds, a deadline which is moved forward
+# (a task scheduled with a short delay while the next deadline is further away) is picked up within a slice
+ALARM_SLICE = 0.25
+# the worker pools for the background tasks, the player has its own worker so its polling is never held up
+POOL_BACKGROUND = "background"
+POOL_PLAYER = "player"
+POOLS = {POOL_BACKGROUND: 2, POOL_PLAYER: 1}
+
+_clock_lock = threading.Lock()
+_clock_state = {"last": time.time(), "offset": 0.0}
+
+
+def monotonic():
+    '''time.time() corrected for the clock jumping backwards (python 2 has no monotonic clock)'''
+    with _clock_lock:
+        now = time.time() + _clock_state["offset"]
+        if now < _clock_state["last"]:
+            _clock_state["offset"] += _clock_state["last"] - now
+            now = _clock_state["last"]
+        _clock_state["last"] = now
+        return now
+
+
+class ScheduledTask(object):
+    '''a registered task with its runtime accounting'''
+
+    def __init__(self, name, func, interval, jitter, repeat, background, pool):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.repeat = repeat
+        self.background = background
+        self.pool = pool
+        self.cancelled = False
+        self.deadline = 0
+        self.runs = 0
+        self.runtime = 0.0
+        self.max_runtime = 0.0
+        self.max_lateness = 0.0
+
+    def next_deadline(self, delay):
+        '''the next deadline after the given delay, spread by the jitter'''
+        return monotonic() + delay + (random.uniform(0, self.jitter) if self.jitter else 0)
+
+    def stats(self):
+        '''return a dict with the runtime accounting'''
+        return {
+            "runs": self.runs,
+            "runtime": round(self.runtime, 3),
+            "maxruntime": round(self.max_runtime, 3),
+            "maxlateness": round(self.max_lateness, 3)
+        }
+
+
+class Scheduler(threading.Thread):
+    '''
+        runs the registered tasks when their deadline passes, repeating tasks are rescheduled
+        after they finished. Tasks run on the timer thread unless they are marked as background
+        tasks which may block, those run on a small worker pool.
+        python 2 implements a wait with timeout by polling (sleeps of up to 50ms), so the timer thread
+        waits without timeout and is notified by an alarm thread. The alarm thread blocks on an event
+        while nothing is due and sleeps in native code (in slices of ALARM_SLICE) untill the deadline.
+    '''
+
+    def __init__(self, metrics=None):
+        threading.Thread.__init__(self, name="SkinHelperScheduler")
+        self.daemon = True
+        self.metrics = metrics
+        self.tasks = {}
+        self._heap = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._pools = dict((name, WorkerPool(num_workers=num_workers, name="Scheduler-%s" % name))
+                           for name, num_workers in POOLS.iteritems())
+        self._monitor = xbmc.Monitor()
+        # the deadline the alarm thread wakes us up at and the event which wakes up the idle alarm thread
+        self._alarm = None
+        self._rearm = threading.Event()
+        self._alarm_thread = threading.Thread(target=self._run_alarm, name="SkinHelperSchedulerAlarm")
+        self._alarm_thread.daemon = True
+        self._exit = False
+
+    def schedule(self, name, func, interval=0, delay=None, jitter=0, repeat=True, background=False,
+                 pool=POOL_BACKGROUND):
+        '''
+            register a task, replaces an existing task with the same name.
+            the task runs after delay (defaults to the interval) and is repeated every interval seconds
+            untill it's cancelled or returns False. background tasks run on the given worker pool.
+        '''
+        task = ScheduledTask(name, func, interval, jitter, repeat, background, pool)
+        task.deadline = task.next_deadline(interval if delay is None else delay)
+        with self._cond:
+            if name in self.tasks:
+                self.tasks[name].cancelled = True
+            self.tasks[name] = task
+            heapq.heappush(self._heap, (task.deadline, next(self._counter), task))
+            self._cond.notify()
+        return task
+
+    def cancel(self, name):
+        '''unregister the task with the given name'''
+        with self._cond:
+            task = self.tasks.pop(name, None)
+            if task:
+                task.cancelled = True
+
+    def stop(self):
+        '''stop the timer thread'''
+        with self._cond:
+            self._exit = True
+            self._cond.notify()
+        self._rearm.set()
+        for pool in self._pools.itervalues():
+            pool.stop()
+        self.join(1)
+
+    def stats(self):
+        '''return the runtime accounting of all tasks'''
+        with self._cond:
+            return dict((name, task.stats()) for name, task in self.tasks.iteritems())
+
+    def run(self):
+        '''the timer loop'''
+        for pool in self._pools.itervalues():
+            pool.start()
+        self._alarm_thread.start()
+        while not self._exit:
+            with self._cond:
+                while not self._exit and (not self._heap or self._heap[0][0] > monotonic()):
+                    if self._heap:
+                        self._set_alarm(self._heap[0][0])
+                    self._cond.wait()
+                if self._exit:
+                    break
+                task = heapq.heappop(self._heap)[2]
+            if task.cancelled:
+                continue
+            task.max_lateness = max(task.max_lateness, monotonic() - task.deadline)
+            if task.background:
+                self._pools[task.pool].submit(self._execute, (task,))
+            else:
+                self._execute(task)
+
+    def _set_alarm(self, deadline):
+        '''make sure the timer thread is notified at the deadline, lock must be held by the caller'''
+        if self._alarm is not None and self._alarm <= deadline:
+            return
+        self._alarm = deadline
+        self._rearm.set()
+
+    def _run_alarm(self):
+        '''the alarm loop: notify the timer thread when the armed deadline passes'''
+        while not self._exit:
+            # an event wait without timeout blocks in native code
+            self._rearm.wait()
+            self._rearm.clear()
+            while not self._exit:
+                with self._cond:
+                    deadline = self._alarm
+                if deadline is None:
+                    break
+                timeout = deadline - monotonic()
+                if timeout > 0:
+                    # the deadline is read again after every slice, it might have been moved forward
+                    if self._monitor.waitForAbort(min(timeout, ALARM_SLICE)):
+                        # kodi exits, the service stops the scheduler
+                        return
+                    continue
+                with self._cond:
+                    if self._alarm == deadline:
+                        self._alarm = None
+                    self._cond.notify()
+
+    def _execute(self, task):
+        '''run the task, keep track of its runtime and reschedule it'''
+        start = monotonic()
+        result = None
+        try:
+            result = task.func()
+        except Exception as exc:
+            log_exception(__name__, exc)
+        runtime = monotonic() - start
+        task.runs += 1
+        task.runtime += runtime
+        task.max_runtime = max(task.max_runtime, runtime)
+        if self.metrics:
+            self.metrics.record("scheduler.%s" % task.name, runtime)
+        if runtime > SLOW_TASK and not task.background:
+            log_msg("Scheduler - task %s took %.2f seconds" % (task.name, runtime))
+        with self._cond:
+            if task.repeat and result is not False and not task.cancelled:
+                task.deadline = task.next_deadline(task.interval)
+                heapq.heappush(self._heap, (task.deadline, next(self._counter), task))
+                self._cond.notify()
+            elif self.tasks.get(task.name) is task:
+                del self.tasks[task.name]
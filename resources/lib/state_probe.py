@@ -0,0 +1,85 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+    script.skin.helper.service
+    Helper service and scripts for Kodi skins
+    state_probe.py
+    Reads all the gui state the listitem monitor needs per iteration with a minimum of calls to kodi
+'''
+
+from utils import get_infolabels, getCondVisibility
+
+MANUAL_LOOKUP = "Window(Home).Property(SkinHelper.Artwork.ManualLookup)"
+WIDGET_CONTAINER = "Window(Home).Property(SkinHelper.WidgetContainer)"
+FOLDER_LABELS = ["Window.Property(xmlfile)", "Container.FolderPath", "Container.NumItems", "Container.Content"]
+MODAL_DIALOGS = "Window.IsActive(DialogSelect.xml) | Window.IsActive(progressdialog) | " \
+    "Window.IsActive(contextmenu) | Window.IsActive(busydialog)"
+SCROLLING = "Container.OnScrollNext | Container.OnScrollPrevious | Container.Scrolling"
+MEDIA = "Window.IsMedia | !IsEmpty(%s)" % WIDGET_CONTAINER
+# the usual state: no dialogs, not scrolling and a media window or widget active
+MONITOR = "![%s] + ![%s] + [%s]" % (MODAL_DIALOGS, SCROLLING, MEDIA)
+
+# the modes the listitem monitor dispatches on
+MODE_MANUAL_LOOKUP = "manuallookup"
+MODE_MODAL = "modal"
+MODE_SCROLLING = "scrolling"
+MODE_MONITOR = "monitor"
+MODE_INACTIVE = "inactive"
+
+
+class ListState(object):
+    '''the decoded state of a single probe'''
+    __slots__ = ["mode", "folder", "cont_prefix", "listitem"]
+
+    def __init__(self, mode, folder="", cont_prefix="", listitem=None):
+        self.mode = mode
+        self.folder = folder
+        self.cont_prefix = cont_prefix
+        self.listitem = listitem
+
+
+class StateProbe(object):
+    '''
+        one batched infolabel read (properties, folder and the identifying labels of the focused listitem)
+        and one combined condition for the usual case, the separate conditions are only evaluated
+        when we're not monitoring anyway
+    '''
+
+    def __init__(self, listitem_props):
+        self.listitem_props = listitem_props
+        self.widget = ""
+
+    def read(self):
+        '''probe the current state'''
+        widget = self.widget
+        labels = [MANUAL_LOOKUP, WIDGET_CONTAINER] + FOLDER_LABELS
+        labels += ["ListItem.%s" % prop for prop in self.listitem_props]
+        if widget:
+            # assume the widget container didn't change since the last probe
+            labels += ["Container(%s).NumItems" % widget, "Container(%s).ListItemAbsolute(1).Label" % widget]
+            labels += ["Container(%s).ListItem.%s" % (widget, prop) for prop in self.listitem_props]
+        values = get_infolabels(labels)
+
+        if values[MANUAL_LOOKUP]:
+            return ListState(MODE_MANUAL_LOOKUP)
+        if not getCondVisibility(MONITOR):
+            if getCondVisibility(MODAL_DIALOGS):
+                return ListState(MODE_MODAL)
+            if getCondVisibility(SCROLLING):
+                return ListState(MODE_SCROLLING)
+            return ListState(MODE_INACTIVE)
+
+        if values[WIDGET_CONTAINER] != widget:
+            # the widget container changed, probe again with the new one
+            self.widget = values[WIDGET_CONTAINER]
+            return self.read()
+        if widget and not getCondVisibility("Window.IsActive(movieinformation)"):
+            cont_prefix = "Container(%s)." % widget
+            folder = u"widget-%s-%s-%s" % (widget, values["Container(%s).NumItems" % widget],
+                                           values["Container(%s).ListItemAbsolute(1).Label" % widget])
+        else:
+            cont_prefix = ""
+            folder = u"".join(values[label] for label in FOLDER_LABELS)
+        listitem = dict((prop, values["%sListItem.%s" % (cont_prefix, prop)]) for prop in self.listitem_props)
+        return ListState(MODE_MONITOR, folder, cont_prefix, listitem)
@@ -23,6 +23,8 @@ except Exception:
 ADDON_ID = "script.skin.helper.service"
 KODI_VERSION = int(xbmc.getInfoLabel("System.BuildVersion").split(".")[0])
 KODILANGUAGE = xbmc.getLanguage(xbmc.ISO_639_1)
+# separator used to read multiple infolabels at once, should never occur in an actual value
+INFOLABEL_SEPARATOR = u"[|SH|]"
 
 
 def log_msg(msg, loglevel=xbmc.LOGDEBUG):
@@ -96,100 +98,6 @@ def urlencode(text):
     return blah
 
 
-def get_current_content_type(containerprefix=""):
-    '''tries to determine the mediatype for the current listitem'''
-    content_type = ""
-    if not containerprefix:
-        if getCondVisibility("Container.Content(episodes)"):
-            content_type = "episodes"
-        elif getCondVisibility("Container.Content(movies) + !String.Contains(Container.FolderPath,setid=)"):
-            content_type = "movies"
-        elif getCondVisibility("[Container.Content(sets) | "
-                                    "String.IsEqual(Container.Folderpath,videodb://movies/sets/)] + "
-                                    "!String.Contains(Container.FolderPath,setid=)"):
-            content_type = "sets"
-        elif getCondVisibility("String.Contains(Container.FolderPath,setid=)"):
-            content_type = "setmovies"
-        elif getCondVisibility("!String.IsEmpty(Container.Content) + !String.IsEqual(Container.Content,pvr)"):
-            content_type = xbmc.getInfoLabel("Container.Content")
-        elif getCondVisibility("Container.Content(tvshows)"):
-            content_type = "tvshows"
-        elif getCondVisibility("Container.Content(seasons)"):
-            content_type = "seasons"
-        elif getCondVisibility("Container.Content(musicvideos)"):
-            content_type = "musicvideos"
-        elif getCondVisibility("Container.Content(songs) | "
-                                    "String.IsEqual(Container.FolderPath,musicdb://singles/)"):
-            content_type = "songs"
-        elif getCondVisibility("Container.Content(artists)"):
-            content_type = "artists"
-        elif getCondVisibility("Container.Content(albums)"):
-            content_type = "albums"
-        elif getCondVisibility("Window.IsActive(MyPVRChannels.xml) | Window.IsActive(MyPVRGuide.xml) | "
-                                    "Window.IsActive(MyPVRSearch.xml) | Window.IsActive(pvrguideinfo)"):
-            content_type = "tvchannels"
-        elif getCondVisibility("Window.IsActive(MyPVRRecordings.xml) | Window.IsActive(MyPVRTimers.xml) | "
-                                    "Window.IsActive(pvrrecordinginfo)"):
-            content_type = "tvrecordings"
-        elif getCondVisibility("Window.IsActive(programs) | Window.IsActive(addonbrowser)"):
-            content_type = "addons"
-        elif getCondVisibility("Window.IsActive(pictures)"):
-            content_type = "pictures"
-        elif getCondVisibility("Container.Content(genres)"):
-            content_type = "genres"
-        elif getCondVisibility("Container.Content(files)"):
-            content_type = "files"
-    # last resort: try to determine type by the listitem properties
-    if not content_type and (containerprefix or getCondVisibility("Window.IsActive(movieinformation)")):
-        if getCondVisibility("!String.IsEmpty(%sListItem.DBTYPE)" % containerprefix):
-            content_type = xbmc.getInfoLabel("%sListItem.DBTYPE" % containerprefix) + "s"
-        elif getCondVisibility("!String.IsEmpty(%sListItem.Property(DBTYPE))" % containerprefix):
-            content_type = xbmc.getInfoLabel("%sListItem.Property(DBTYPE)" % containerprefix) + "s"
-        elif getCondVisibility("String.Contains(%sListItem.FileNameAndPath,playrecording) | "
-                                    "String.Contains(%sListItem.FileNameAndPath,tvtimer)"
-                                    % (containerprefix, containerprefix)):
-            content_type = "tvrecordings"
-        elif getCondVisibility("String.Contains(%sListItem.FileNameAndPath,launchpvr)" % (containerprefix)):
-            content_type = "tvchannels"
-        elif getCondVisibility("String.Contains(%sListItem.FolderPath,pvr://channels)" % containerprefix):
-            content_type = "tvchannels"
-        elif getCondVisibility("String.Contains(%sListItem.FolderPath,flix2kodi) + String.Contains(%sListItem.Genre,Series)"
-                                    % (containerprefix, containerprefix)):
-            content_type = "tvshows"
-        elif getCondVisibility("String.Contains(%sListItem.FolderPath,flix2kodi)" % (containerprefix)):
-            content_type = "movies"
-        elif getCondVisibility("!String.IsEmpty(%sListItem.Artist) + String.IsEqual(%sListItem.Label,%sListItem.Artist)"
-                                    % (containerprefix, containerprefix, containerprefix)):
-            content_type = "artists"
-        elif getCondVisibility("!String.IsEmpty(%sListItem.Album) + String.IsEqual(%sListItem.Label,%sListItem.Album)"
-                                    % (containerprefix, containerprefix, containerprefix)):
-            content_type = "albums"
-        elif getCondVisibility("!String.IsEmpty(%sListItem.Artist) + !String.IsEmpty(%sListItem.Album)"
-                                    % (containerprefix, containerprefix)):
-            content_type = "songs"
-        elif getCondVisibility("!String.IsEmpty(%sListItem.TvShowTitle) + "
-                                    "String.IsEqual(%sListItem.Title,%sListItem.TvShowTitle)"
-                                    % (containerprefix, containerprefix, containerprefix)):
-            content_type = "tvshows"
-        elif getCondVisibility("!String.IsEmpty(%sListItem.Property(TotalEpisodes))" % (containerprefix)):
-            content_type = "tvshows"
-        elif getCondVisibility("!String.IsEmpty(%sListItem.TvshowTitle) + !String.IsEmpty(%sListItem.Season)"
-                                    % (containerprefix, containerprefix)):
-            content_type = "episodes"
-        elif getCondVisibility("String.IsEmpty(%sListItem.TvshowTitle) + !String.IsEmpty(%sListItem.Year)"
-                                    % (containerprefix, containerprefix)):
-            content_type = "movies"
-        elif getCondVisibility("String.Contains(%sListItem.FolderPath,movies)" % containerprefix):
-            content_type = "movies"
-        elif getCondVisibility("String.Contains(%sListItem.FolderPath,shows)" % containerprefix):
-            content_type = "tvshows"
-        elif getCondVisibility("String.Contains(%sListItem.FolderPath,episodes)" % containerprefix):
-            content_type = "episodes"
-        elif getCondVisibility("!String.IsEmpty(%sListItem.Property(ChannelLogo))" % (containerprefix)):
-            content_type = "tvchannels"
-    return content_type
-
-
 def recursive_delete_dir(path):
     '''helper to recursively delete a directory'''
     success = True
@@ -253,6 +161,26 @@ def clean_string(text):
     return text
     
     
+def get_infolabels(infolabels, prefix=""):
+    '''read multiple infolabels with a single call to kodi, returns dict with the infolabels as keys'''
+    if not infolabels:
+        return {}
+    template = INFOLABEL_SEPARATOR.join([u"$INFO[%s%s]" % (prefix, label) for label in infolabels])
+    values = try_decode(xbmc.getInfoLabel(try_encode(template))).split(INFOLABEL_SEPARATOR)
+    if len(values) != len(infolabels):
+        # one of the values contains our separator, fallback to reading the labels one by one
+        values = [try_decode(xbmc.getInfoLabel(try_encode(u"%s%s" % (prefix, label)))) for label in infolabels]
+    return dict(zip(infolabels, values))
+
+
+def get_skin_int(setting, default=0):
+    '''get the integer value of a skin string setting, returns default if not set'''
+    try:
+        return int(xbmc.getInfoLabel("Skin.String(%s)" % setting))
+    except ValueError:
+        return default
+
+
 def getCondVisibility(text):
     '''executes the builtin getCondVisibility'''
     # temporary solution: check if strings needs to be adjusted for backwards compatability
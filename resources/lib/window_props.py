@@ -0,0 +1,167 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+    script.skin.helper.service
+    Helper service and scripts for Kodi skins
+    window_props.py
+    Keeps track of the window properties set by the service and only writes the differences
+'''
+
+import threading
+
+
+class WindowProperties(object):
+    '''set based bookkeeping of the window properties we have set on a window'''
+
+    def __init__(self, win):
+        self.win = win
+        self.transitions = 0
+        self.last_transition_calls = 0
+        self.set_calls = 0
+        self.clear_calls = 0
+        self._props = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._props)
+
+    def __contains__(self, key):
+        return key in self._props
+
+    def set_props(self, prop_tuples):
+        '''make the given key/value tuples the complete set of our properties'''
+        new_props = dict((key, value) for key, value in prop_tuples if value)
+        with self._lock:
+            calls = self._clear_keys(set(self._props) - set(new_props))
+            calls += self._set_changed(new_props)
+            self._count_transition(calls)
+
+    def add_props(self, prop_tuples):
+        '''set the given key/value tuples, properties which are already set are left untouched'''
+        with self._lock:
+            calls = self._set_changed(dict((key, value) for key, value in prop_tuples
+                                           if value and key not in self._props))
+            self._count_transition(calls)
+
+    def set_prop(self, key, value):
+        '''set (or clear if the value is empty) a single property'''
+        with self._lock:
+            if value:
+                calls = self._set_changed({key: value})
+            else:
+                calls = self._clear_keys([key] if key in self._props else [])
+            self._count_transition(calls)
+
+    def clear(self):
+        '''clear all properties we have set'''
+        with self._lock:
+            self._count_transition(self._clear_keys(self._props.keys()))
+
+    def stats(self):
+        '''return a dict with the counters'''
+        with self._lock:
+            return {
+                "live": len(self._props),
+                "transitions": self.transitions,
+                "lastcalls": self.last_transition_calls,
+                "setcalls": self.set_calls,
+                "clearcalls": self.clear_calls
+            }
+
+    def _set_changed(self, props):
+        '''set the properties of which the value changed, lock must be held by the caller'''
+        calls = 0
+        for key, value in props.iteritems():
+            if self._props.get(key) != value:
+                self._props[key] = value
+                self.win.setProperty(key, value)
+                calls += 1
+        self.set_calls += calls
+        return calls
+
+    def _clear_keys(self, keys):
+        '''clear the given properties, lock must be held by the caller'''
+        calls = 0
+        for key in keys:
+            del self._props[key]
+            self.win.clearProperty(key)
+            calls += 1
+        self.clear_calls += calls
+        return calls
+
+    def _count_transition(self, calls):
+        '''keep track of the number of kodi calls a transition cost'''
+        self.transitions += 1
+        self.last_transition_calls = calls
+
+
+class DoubleBufferedProperties(object):
+    '''
+        writes the properties in the inactive one of two namespaces (e.g. SkinHelper.ListItemA./B.)
+        and flips the generation property afterwards, so the skin sees a complete update at once
+    '''
+
+    def __init__(self, win, prefix):
+        self.win = win
+        # the keys are lowercased by prepare_win_props, kodi treats the property names case insensitive
+        self.prefix = prefix.lower()
+        self.gen_key = "%sGen" % prefix
+        self.buffers = {"A": WindowProperties(win), "B": WindowProperties(win)}
+        self.active = "A"
+        self.flips = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.buffers[self.active])
+
+    def __contains__(self, key):
+        return self._translate(key, self.active) in self.buffers[self.active]
+
+    def set_props(self, prop_tuples):
+        '''write the complete set of properties in the inactive buffer and make it the active one'''
+        with self._lock:
+            inactive = self._inactive()
+            self.buffers[inactive].set_props([(self._translate(key, inactive), value) for key, value in prop_tuples])
+            self._flip(inactive)
+
+    def clear(self):
+        '''switch to an empty buffer'''
+        with self._lock:
+            if not len(self.buffers[self.active]):
+                return
+            inactive = self._inactive()
+            self.buffers[inactive].clear()
+            self._flip(inactive)
+
+    def clear_all(self):
+        '''clear both buffers and the generation, used when leaving the double buffered mode'''
+        with self._lock:
+            for buf in self.buffers.itervalues():
+                buf.clear()
+            self.win.clearProperty(self.gen_key)
+
+    def stats(self):
+        '''return a dict with the counters of both buffers'''
+        with self._lock:
+            result = {"flips": self.flips, "active": self.active}
+            for name, buf in self.buffers.iteritems():
+                for key, value in buf.stats().iteritems():
+                    result[key] = result.get(key, 0) + value
+            return result
+
+    def _inactive(self):
+        '''name of the buffer which is not visible'''
+        return "B" if self.active == "A" else "A"
+
+    def _translate(self, key, buf):
+        '''skinhelper.listitem.xxx becomes skinhelper.listitema.xxx'''
+        if key.lower().startswith(self.prefix):
+            return u"%s%s.%s" % (self.prefix[:-1], buf.lower(), key[len(self.prefix):].lower())
+        return key
+
+    def _flip(self, buf):
+        '''make the given buffer the visible one'''
+        self.active = buf
+        self.flips += 1
+        self.win.setProperty(self.gen_key, buf)
@@ -0,0 +1,120 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+    script.skin.helper.service
+    Helper service and scripts for Kodi skins
+    worker_pool.py
+    Fixed size pool of worker threads fed by a priority queue
+'''
+
+import threading
+import itertools
+import Queue
+from utils import log_exception
+
+# lower value means higher priority
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 10
+
+
+class Task(object):
+    '''a unit of work for the pool which can be cancelled cooperatively'''
+
+    def __init__(self, func, args=(), priority=PRIORITY_NORMAL, cancel_check=None):
+        self.func = func
+        self.args = args
+        self.priority = priority
+        self.cancel_check = cancel_check
+        self.result = None
+        self._cancelled = False
+        self._done = threading.Event()
+
+    def cancel(self):
+        '''mark the task as cancelled, a queued task will never be started'''
+        self._cancelled = True
+
+    @property
+    def cancelled(self):
+        '''task is cancelled explicitly or its cancel condition became true'''
+        return self._cancelled or bool(self.cancel_check and self.cancel_check())
+
+    @property
+    def done(self):
+        '''task finished (or was skipped because it got cancelled)'''
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        '''wait for the task to finish, returns True if it finished within the timeout'''
+        return self._done.wait(timeout)
+
+    def run(self):
+        '''execute the task and store its result'''
+        try:
+            self.result = self.func(*self.args)
+        finally:
+            self._done.set()
+        return self.result
+
+    def skip(self):
+        '''mark the task as finished without running it'''
+        self._done.set()
+
+
+class WorkerPool(object):
+    '''a fixed number of worker threads processing tasks in order of priority'''
+
+    def __init__(self, num_workers=3, name="WorkerPool"):
+        self.name = name
+        self.num_workers = num_workers
+        self.cancelled_count = 0
+        self._queue = Queue.PriorityQueue()
+        self._counter = itertools.count()
+        self._workers = []
+        self._exit = False
+
+    def start(self):
+        '''start the worker threads'''
+        self._exit = False
+        for count in range(self.num_workers):
+            worker = threading.Thread(target=self._work, name="%s-%s" % (self.name, count))
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self, timeout=1):
+        '''stop all workers, pending tasks are discarded'''
+        self._exit = True
+        for worker in self._workers:
+            self._queue.put((PRIORITY_HIGH, next(self._counter), None))
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+
+    def submit(self, func, args=(), priority=PRIORITY_NORMAL, cancel_check=None):
+        '''queue a new task, returns the task object'''
+        task = Task(func, args, priority, cancel_check)
+        # the counter keeps the order of tasks with the same priority (fifo)
+        self._queue.put((priority, next(self._counter), task))
+        return task
+
+    def qsize(self):
+        '''number of tasks waiting in the queue'''
+        return self._queue.qsize()
+
+    def _work(self):
+        '''main loop of a worker thread'''
+        while not self._exit:
+            task = self._queue.get()[2]
+            if task is None or self._exit:
+                break
+            if task.cancelled:
+                # superseded before we got to it
+                self.cancelled_count += 1
+                task.skip()
+                continue
+            try:
+                task.run()
+            except Exception as exc:
+                log_exception(__name__, exc)
@@ -0,0 +1,69 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+    script.skin.helper.service
+    Helper service and scripts for Kodi skins
+    zapping.py
+    Coalesces the player events of channel surfing
+'''
+
+import threading
+from functools import partial
+from utils import get_skin_int
+
+
+class ZappingCoalescer(object):
+    '''
+        channel surfing gives a quick succession of Player.OnStop/Player.OnPlay events. The handling of a
+        channel is postponed untill it's watched for the settle time. Every player event starts a new
+        generation, the work for an older generation is abandoned.
+    '''
+
+    def __init__(self, scheduler, metrics):
+        self.scheduler = scheduler
+        self.generation = 0
+        self.pending = False
+        self.coalesced = 0
+        self.settled = 0
+        self._lock = threading.Lock()
+        metrics.gauge("zapping", self.stats)
+
+    def next_generation(self):
+        '''a new player event, the pending and in-flight work of the previous event is obsolete'''
+        with self._lock:
+            self.generation += 1
+            if self.pending:
+                self.pending = False
+                self.coalesced += 1
+            self.scheduler.cancel("player.settle")
+            return self.generation
+
+    def is_current(self, generation):
+        '''no player events arrived since the given generation'''
+        return generation == self.generation
+
+    def defer(self, func):
+        '''run func when no other player event arrived within the settle time'''
+        generation = self.next_generation()
+        with self._lock:
+            self.pending = True
+        settle = get_skin_int("SkinHelper.PVR.ZapSettle", 1000) / 1000.0
+        self.scheduler.schedule("player.settle", partial(self.settle, generation, func), delay=settle, repeat=False)
+        return generation
+
+    def settle(self, generation, func):
+        '''the channel is watched for the settle time'''
+        with self._lock:
+            if not self.is_current(generation) or not self.pending:
+                return
+            self.pending = False
+            self.settled += 1
+        func()
+
+    def stats(self):
+        '''return a dict with the counters'''
+        return {
+            "coalesced": self.coalesced,
+            "settled": self.settled
+        }
@@ -0,0 +1,47 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+    script.skin.helper.service
+    Helper service and scripts for Kodi skins
+    benchmark_content_types.py
+    Number of kodi calls and time per content type lookup, rule table versus the old condition chain
+    Usage: python tests/benchmark_content_types.py [number of fixtures]
+'''
+
+import sys
+import time
+import kodi_fakes
+kodi_fakes.install()
+from content_types import get_current_content_type
+from content_type_fixtures import make_fixtures, use_fixture, legacy_content_type, CONTAINER_PREFIX
+
+
+def measure(func, fixtures, containerprefix):
+    '''returns the average infolabel reads, conditions and microseconds per lookup'''
+    infolabels = conditions = 0
+    duration = 0.0
+    for labels, windows in fixtures:
+        use_fixture(labels, windows)
+        start = time.time()
+        func(containerprefix)
+        duration += time.time() - start
+        infolabels += kodi_fakes.KODI.infolabel_calls
+        conditions += kodi_fakes.KODI.condition_calls
+    count = float(len(fixtures))
+    return infolabels / count, conditions / count, 1000000 * duration / count
+
+
+def main(count):
+    '''print the results for the main container and a container with a prefix'''
+    print "%-22s %-8s %10s %10s %10s" % ("container", "impl", "infolabels", "conditions", "usec")
+    for name, containerprefix in [("main", ""), ("prefixed", CONTAINER_PREFIX)]:
+        fixtures = make_fixtures(count, containerprefix)
+        for impl, func in [("chain", legacy_content_type), ("rules", get_current_content_type)]:
+            infolabels, conditions, usec = measure(func, fixtures, containerprefix)
+            print "%-22s %-8s %10.2f %10.2f %10.1f" % (name, impl, infolabels, conditions, usec)
+    print "the time includes the fake condition evaluator, the number of calls to kodi is what counts"
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
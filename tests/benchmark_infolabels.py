@@ -0,0 +1,78 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+    script.skin.helper.service
+    Helper service and scripts for Kodi skins
+    benchmark_infolabels.py
+    Kodi calls and time to read the listitem and player infolabels one by one versus in a single call
+    Usage: python tests/benchmark_infolabels.py [number of reads] [cost of a kodi call in ms]
+'''
+
+import re
+import sys
+import time
+import kodi_fakes
+kodi_fakes.install()
+import xbmc
+from utils import get_infolabels
+
+# the infolabels get_listitem_details reads when the folder is not preloaded, built like it does
+LISTITEM_LABELS = ["TvshowTitle", "Artist", "Album", "Label", "DBID", "Title"]
+for _prop in ["dbtype", "dbid", "imdbnumber"]:
+    LISTITEM_LABELS += [_prop, "Property(%s)" % _prop]
+for _prop in ["label", "title", "filenameandpath", "year", "genre", "path", "folderpath", "duration", "plot",
+              "plotoutline", "label2", "icon", "thumb", "studio", "tvshowtitle", "premiered", "director", "writer",
+              "firstaired", "tagline", "rating", "season", "episode", "artist", "album", "albumartist",
+              "discnumber", "channel", "channelname"]:
+    if _prop not in LISTITEM_LABELS:
+        LISTITEM_LABELS.append(_prop)
+for _prop in ["fanart", "poster", "clearlogo", "clearart", "landscape", "thumb", "banner", "discart", "characterart"]:
+    LISTITEM_LABELS += ["Art(%s)" % _prop, "Art(tvshow.%s)" % _prop]
+# the infolabels get_player_infolabels reads
+PLAYER_LABELS = ["VideoPlayer.%s" % prop for prop in [
+    "title", "filenameandpath", "year", "genre", "duration", "plot", "plotoutline", "studio", "tvshowtitle",
+    "premiered", "director", "writer", "season", "episode", "artist", "album", "rating", "albumartist",
+    "discnumber", "firstaired", "mpaa", "tagline", "rating", "imdbnumber"]] + ["Player.Art(%s)" % art for art in [
+        "fanart", "poster", "clearlogo", "clearart", "landscape", "characterart", "thumb", "banner", "discart",
+        "tvshow.landscape", "tvshow.clearlogo", "tvshow.poster", "tvshow.fanart", "tvshow.banner"]]
+
+
+def fake_kodi(call_cost):
+    '''every call to kodi costs call_cost seconds (the python/gui lock round trip), values are the label names'''
+    def infolabel(label):
+        end = time.time() + call_cost
+        while time.time() < end:
+            pass
+        return re.sub(r"\$INFO\[(.*?)\]", lambda match: match.group(1), label)
+    kodi_fakes.KODI.reset()
+    kodi_fakes.KODI.infolabel = infolabel
+
+
+def one_by_one(labels, prefix=""):
+    '''the way the labels were read before'''
+    return dict((label, xbmc.getInfoLabel("%s%s" % (prefix, label)).decode("utf-8"))
+                for label in labels)
+
+
+def measure(func, labels, prefix, count):
+    '''returns the kodi calls and milliseconds per read'''
+    start = time.time()
+    for _ in range(count):
+        func(labels, prefix)
+    return kodi_fakes.KODI.infolabel_calls / float(count), 1000 * (time.time() - start) / count
+
+
+def main(count, call_cost):
+    '''print the results for the listitem and the player labels'''
+    print "%-10s %-12s %8s %8s" % ("labels", "impl", "calls", "ms")
+    for name, labels, prefix in [("listitem", LISTITEM_LABELS, "ListItem."), ("player", PLAYER_LABELS, "")]:
+        for impl, func in [("one by one", one_by_one), ("batched", get_infolabels)]:
+            fake_kodi(call_cost)
+            calls, msec = measure(func, labels, prefix, count)
+            print "%-10s %-12s %8.1f %8.2f" % (name, impl, calls, msec)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+         float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.0002)
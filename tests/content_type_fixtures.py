@@ -0,0 +1,240 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+    script.skin.helper.service
+    Helper service and scripts for Kodi skins
+    content_type_fixtures.py
+    The condition chain get_current_content_type used before the rule table, a condition evaluator
+    for the fake kodi module and random fixtures to compare both
+'''
+
+import random
+import re
+import xbmc
+import kodi_fakes
+from utils import getCondVisibility
+
+# the values the fixtures pick from, chosen so every rule of the chain can match
+LABEL_VALUES = {
+    "Container.Content": ["", "episodes", "movies", "Movies", "sets", "tvshows", "seasons", "musicvideos", "songs",
+                          "artists", "albums", "genres", "files", "pvr", "addons"],
+    "Container.FolderPath": ["", "videodb://movies/sets/", "videodb://movies/titles/?setid=3", "musicdb://singles/",
+                             "plugin://plugin.video.example/"],
+    "ListItem.DBTYPE": ["", "", "movie", "episode"],
+    "ListItem.Property(DBTYPE)": ["", "", "tvshow"],
+    "ListItem.FileNameAndPath": ["", "", "plugin://pvr/playrecording/1", "pvr://tvtimer/2", "launchpvr(3)",
+                                 "/media/film.mkv"],
+    "ListItem.FolderPath": ["", "", "pvr://channels/tv/", "plugin://plugin.video.flix2kodi/", "/media/movies/",
+                            "/media/tv shows/", "/media/episodes/"],
+    "ListItem.Genre": ["", "Series", "Drama"],
+    "ListItem.Artist": ["", "Abba"],
+    "ListItem.Label": ["", "Abba", "Gold", "Lost", "abba"],
+    "ListItem.Album": ["", "Gold"],
+    "ListItem.TvShowTitle": ["", "Lost"],
+    "ListItem.Title": ["", "Lost", "Pilot"],
+    "ListItem.Property(TotalEpisodes)": ["", "", "10"],
+    "ListItem.Season": ["", "1"],
+    "ListItem.Year": ["", "2004"],
+    "ListItem.Property(ChannelLogo)": ["", "", "logo.png"]
+}
+WINDOWS = ["programs", "addonbrowser", "pictures", "MyPVRChannels.xml", "MyPVRGuide.xml", "MyPVRSearch.xml",
+           "pvrguideinfo", "MyPVRRecordings.xml", "MyPVRTimers.xml", "pvrrecordinginfo", "movieinformation",
+           "videos", "busydialog"]
+CONTAINER_PREFIX = "Container(50)."
+
+
+def make_fixture(rnd, containerprefix=""):
+    '''a random state of kodi: the infolabels (lowercased names) and the active windows'''
+    labels = {}
+    for label, values in LABEL_VALUES.iteritems():
+        if label.startswith("ListItem."):
+            label = containerprefix + label
+        labels[label.lower()] = rnd.choice(values)
+    windows = set(window.lower() for window in WINDOWS if rnd.random() < 0.1)
+    return labels, windows
+
+
+def make_fixtures(count, containerprefix="", seed=8):
+    '''a reproducible list of random fixtures'''
+    rnd = random.Random(seed)
+    return [make_fixture(rnd, containerprefix) for _ in range(count)]
+
+
+class ConditionEvaluator(object):
+    '''evaluates the boolean conditions the content type code uses against a fixture'''
+
+    def __init__(self, labels, windows):
+        self.labels = labels
+        self.windows = windows
+
+    def infolabel(self, label):
+        '''a single infolabel or a template with $INFO[] parts'''
+        if "$INFO[" in label:
+            return re.sub(r"\$INFO\[(.*?)\]", lambda match: self.infolabel(match.group(1)), label)
+        return self.labels.get(label.lower(), "")
+
+    def condition(self, text):
+        '''evaluate the condition: ! binds stronger than +, + binds stronger than |'''
+        self.text = text.replace(" ", "")
+        self.pos = 0
+        result = self._or()
+        if self.pos != len(self.text):
+            raise ValueError("can not parse condition %s" % text)
+        return result
+
+    def _or(self):
+        result = self._and()
+        while self._accept("|"):
+            result = self._and() or result
+        return result
+
+    def _and(self):
+        result = self._not()
+        while self._accept("+"):
+            result = self._not() and result
+        return result
+
+    def _not(self):
+        if self._accept("!"):
+            return not self._not()
+        if self._accept("["):
+            result = self._or()
+            if not self._accept("]"):
+                raise ValueError("missing ] in %s" % self.text)
+            return result
+        return self._atom()
+
+    def _accept(self, char):
+        if self.text[self.pos:self.pos + 1] == char:
+            self.pos += 1
+            return True
+        return False
+
+    def _atom(self):
+        start = self.text.index("(", self.pos)
+        depth = 0
+        for end in range(start, len(self.text)):
+            depth += {"(": 1, ")": -1}.get(self.text[end], 0)
+            if not depth:
+                break
+        name = self.text[self.pos:start].lower()
+        args = self.text[start + 1:end].split(",")
+        self.pos = end + 1
+        if name == "window.isactive":
+            return args[0].lower() in self.windows
+        if name == "container.content":
+            return self.infolabel("Container.Content").lower() == args[0].lower()
+        value = self.infolabel(args[0]).lower()
+        if name == "string.isempty":
+            return not value
+        other = args[1] if len(args) > 1 else ""
+        if other.lower() in self.labels:
+            other = self.infolabel(other)
+        if name == "string.isequal":
+            return value == other.lower()
+        if name == "string.contains":
+            return other.lower() in value
+        raise ValueError("unknown condition %s" % name)
+
+
+def use_fixture(labels, windows):
+    '''let the fake kodi module answer from the fixture'''
+    evaluator = ConditionEvaluator(labels, windows)
+    kodi_fakes.KODI.reset()
+    kodi_fakes.KODI.infolabel = evaluator.infolabel
+    kodi_fakes.KODI.condition = evaluator.condition
+
+
+def legacy_content_type(containerprefix=""):
+    '''get_current_content_type before the rule table, one condition per content type'''
+    content_type = ""
+    if not containerprefix:
+        if getCondVisibility("Container.Content(episodes)"):
+            content_type = "episodes"
+        elif getCondVisibility("Container.Content(movies) + !String.Contains(Container.FolderPath,setid=)"):
+            content_type = "movies"
+        elif getCondVisibility("[Container.Content(sets) | "
+                                    "String.IsEqual(Container.Folderpath,videodb://movies/sets/)] + "
+                                    "!String.Contains(Container.FolderPath,setid=)"):
+            content_type = "sets"
+        elif getCondVisibility("String.Contains(Container.FolderPath,setid=)"):
+            content_type = "setmovies"
+        elif getCondVisibility("!String.IsEmpty(Container.Content) + !String.IsEqual(Container.Content,pvr)"):
+            content_type = xbmc.getInfoLabel("Container.Content")
+        elif getCondVisibility("Container.Content(tvshows)"):
+            content_type = "tvshows"
+        elif getCondVisibility("Container.Content(seasons)"):
+            content_type = "seasons"
+        elif getCondVisibility("Container.Content(musicvideos)"):
+            content_type = "musicvideos"
+        elif getCondVisibility("Container.Content(songs) | "
+                                    "String.IsEqual(Container.FolderPath,musicdb://singles/)"):
+            content_type = "songs"
+        elif getCondVisibility("Container.Content(artists)"):
+            content_type = "artists"
+        elif getCondVisibility("Container.Content(albums)"):
+            content_type = "albums"
+        elif getCondVisibility("Window.IsActive(MyPVRChannels.xml) | Window.IsActive(MyPVRGuide.xml) | "
+                                    "Window.IsActive(MyPVRSearch.xml) | Window.IsActive(pvrguideinfo)"):
+            content_type = "tvchannels"
+        elif getCondVisibility("Window.IsActive(MyPVRRecordings.xml) | Window.IsActive(MyPVRTimers.xml) | "
+                                    "Window.IsActive(pvrrecordinginfo)"):
+            content_type = "tvrecordings"
+        elif getCondVisibility("Window.IsActive(programs) | Window.IsActive(addonbrowser)"):
+            content_type = "addons"
+        elif getCondVisibility("Window.IsActive(pictures)"):
+            content_type = "pictures"
+        elif getCondVisibility("Container.Content(genres)"):
+            content_type = "genres"
+        elif getCondVisibility("Container.Content(files)"):
+            content_type = "files"
+    # last resort: try to determine type by the listitem properties
+    if not content_type and (containerprefix or getCondVisibility("Window.IsActive(movieinformation)")):
+        if getCondVisibility("!String.IsEmpty(%sListItem.DBTYPE)" % containerprefix):
+            content_type = xbmc.getInfoLabel("%sListItem.DBTYPE" % containerprefix) + "s"
+        elif getCondVisibility("!String.IsEmpty(%sListItem.Property(DBTYPE))" % containerprefix):
+            content_type = xbmc.getInfoLabel("%sListItem.Property(DBTYPE)" % containerprefix) + "s"
+        elif getCondVisibility("String.Contains(%sListItem.FileNameAndPath,playrecording) | "
+                                    "String.Contains(%sListItem.FileNameAndPath,tvtimer)"
+                                    % (containerprefix, containerprefix)):
+            content_type = "tvrecordings"
+        elif getCondVisibility("String.Contains(%sListItem.FileNameAndPath,launchpvr)" % (containerprefix)):
+            content_type = "tvchannels"
+        elif getCondVisibility("String.Contains(%sListItem.FolderPath,pvr://channels)" % containerprefix):
+            content_type = "tvchannels"
+        elif getCondVisibility("String.Contains(%sListItem.FolderPath,flix2kodi) + String.Contains(%sListItem.Genre,Series)"
+                                    % (containerprefix, containerprefix)):
+            content_type = "tvshows"
+        elif getCondVisibility("String.Contains(%sListItem.FolderPath,flix2kodi)" % (containerprefix)):
+            content_type = "movies"
+        elif getCondVisibility("!String.IsEmpty(%sListItem.Artist) + String.IsEqual(%sListItem.Label,%sListItem.Artist)"
+                                    % (containerprefix, containerprefix, containerprefix)):
+            content_type = "artists"
+        elif getCondVisibility("!String.IsEmpty(%sListItem.Album) + String.IsEqual(%sListItem.Label,%sListItem.Album)"
+                                    % (containerprefix, containerprefix, containerprefix)):
+            content_type = "albums"
+        elif getCondVisibility("!String.IsEmpty(%sListItem.Artist) + !String.IsEmpty(%sListItem.Album)"
+                                    % (containerprefix, containerprefix)):
+            content_type = "songs"
+        elif getCondVisibility("!String.IsEmpty(%sListItem.TvShowTitle) + "
+                                    "String.IsEqual(%sListItem.Title,%sListItem.TvShowTitle)"
+                                    % (containerprefix, containerprefix, containerprefix)):
+            content_type = "tvshows"
+        elif getCondVisibility("!String.IsEmpty(%sListItem.Property(TotalEpisodes))" % (containerprefix)):
+            content_type = "tvshows"
+        elif getCondVisibility("!String.IsEmpty(%sListItem.TvshowTitle) + !String.IsEmpty(%sListItem.Season)"
+                                    % (containerprefix, containerprefix)):
+            content_type = "episodes"
+        elif getCondVisibility("String.IsEmpty(%sListItem.TvshowTitle) + !String.IsEmpty(%sListItem.Year)"
+                                    % (containerprefix, containerprefix)):
+            content_type = "movies"
+        elif getCondVisibility("String.Contains(%sListItem.FolderPath,movies)" % containerprefix):
+            content_type = "movies"
+        elif getCondVisibility("String.Contains(%sListItem.FolderPath,shows)" % containerprefix):
+            content_type = "tvshows"
+        elif getCondVisibility("String.Contains(%sListItem.FolderPath,episodes)" % containerprefix):
+            content_type = "episodes"
+        elif getCondVisibility("!String.IsEmpty(%sListItem.Property(ChannelLogo))" % (containerprefix)):
+            content_type = "tvchannels"
+    return content_type
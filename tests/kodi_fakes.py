@@ -0,0 +1,92 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+    script.skin.helper.service
+    Helper service and scripts for Kodi skins
+    kodi_fakes.py
+    Minimal in-memory replacements of the kodi modules so the service modules can be tested outside of kodi
+'''
+
+import os
+import sys
+import time
+import types
+
+LIB_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "resources", "lib")
+
+
+class FakeWindow(object):
+    '''kodi window with its properties in a dict, property names are case insensitive like in kodi'''
+
+    def __init__(self, window_id=10000):
+        self.window_id = window_id
+        self.props = {}
+        self.set_calls = 0
+        self.clear_calls = 0
+
+    def setProperty(self, key, value):
+        self.set_calls += 1
+        self.props[key.lower()] = value
+
+    def getProperty(self, key):
+        return self.props.get(key.lower(), "")
+
+    def clearProperty(self, key):
+        self.clear_calls += 1
+        self.props.pop(key.lower(), None)
+
+
+class FakeKodi(object):
+    '''the state the fake xbmc module answers from, tests replace the handlers'''
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.infolabel = lambda label: ""
+        self.condition = lambda condition: False
+        self.jsonrpc = lambda request: '{"result": {}}'
+        self.infolabel_calls = 0
+        self.condition_calls = 0
+
+    def getInfoLabel(self, label):
+        self.infolabel_calls += 1
+        if label == "System.BuildVersion":
+            return "17.6 Git:20171114-a9a7a20"
+        return self.infolabel(label)
+
+    def getCondVisibility(self, condition):
+        self.condition_calls += 1
+        return self.condition(condition)
+
+
+KODI = FakeKodi()
+
+
+def install():
+    '''register the fake kodi modules (only if the real ones are not available) and the lib dir on the path'''
+    if LIB_DIR not in sys.path:
+        sys.path.insert(0, LIB_DIR)
+    if "xbmc" in sys.modules:
+        return
+    xbmc = types.ModuleType("xbmc")
+    xbmc.LOGDEBUG, xbmc.LOGINFO, xbmc.LOGNOTICE, xbmc.LOGWARNING, xbmc.LOGERROR = range(5)
+    xbmc.ISO_639_1 = 0
+    xbmc.getInfoLabel = KODI.getInfoLabel
+    xbmc.getCondVisibility = KODI.getCondVisibility
+    xbmc.executeJSONRPC = lambda request: KODI.jsonrpc(request)
+    xbmc.getLanguage = lambda *args: "en"
+    xbmc.getRegion = lambda setting: {"dateshort": "%d/%m/%Y"}.get(setting, "")
+    xbmc.log = lambda msg, level=0: None
+    xbmc.translatePath = lambda path: path
+    xbmc.sleep = lambda msec: None
+    xbmc.Monitor = type("Monitor", (object,), {
+        "abortRequested": lambda self: False,
+        "waitForAbort": lambda self, timeout=0: time.sleep(timeout) or False})
+    xbmcvfs = types.ModuleType("xbmcvfs")
+    xbmcvfs.exists = lambda path: False
+    xbmcvfs.mkdirs = lambda path: True
+    xbmcgui = types.ModuleType("xbmcgui")
+    xbmcgui.Window = FakeWindow
+    sys.modules.update({"xbmc": xbmc, "xbmcvfs": xbmcvfs, "xbmcgui": xbmcgui})
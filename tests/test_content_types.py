@@ -0,0 +1,59 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+    script.skin.helper.service
+    Helper service and scripts for Kodi skins
+    test_content_types.py
+    Compares the rule table with the condition chain it replaced
+'''
+
+import unittest
+import kodi_fakes
+kodi_fakes.install()
+from content_types import get_current_content_type
+from content_type_fixtures import make_fixtures, use_fixture, legacy_content_type, CONTAINER_PREFIX
+
+
+class TestContentTypes(unittest.TestCase):
+
+    def assert_equivalent(self, containerprefix):
+        matched = set()
+        for labels, windows in make_fixtures(5000, containerprefix):
+            use_fixture(labels, windows)
+            expected = legacy_content_type(containerprefix)
+            self.assertEqual(get_current_content_type(containerprefix), expected,
+                             "fixture %s %s" % (labels, sorted(windows)))
+            matched.add(expected)
+        return matched
+
+    def test_equivalent_without_prefix(self):
+        matched = self.assert_equivalent("")
+        # the fixtures reach the window rules and the listitem fallback of the video info dialog
+        for content_type in ["tvchannels", "tvrecordings", "addons", "pictures", "movies", "episodes"]:
+            self.assertIn(content_type, matched)
+
+    def test_equivalent_with_prefix(self):
+        matched = self.assert_equivalent(CONTAINER_PREFIX)
+        for content_type in ["tvchannels", "tvrecordings", "artists", "albums", "songs", "tvshows", "movies"]:
+            self.assertIn(content_type, matched)
+
+    def test_window_under_a_dialog(self):
+        # the busy dialog of setview is on top of the addon browser
+        use_fixture({}, set(["addonbrowser", "busydialog"]))
+        self.assertEqual(get_current_content_type(), "addons")
+        use_fixture({}, set(["pictures"]))
+        self.assertEqual(get_current_content_type(), "pictures")
+
+    def test_calls(self):
+        # a match before the window rules costs one infolabel read
+        use_fixture({"container.content": "movies"}, set(["videos"]))
+        self.assertEqual(get_current_content_type(), "movies")
+        self.assertEqual((kodi_fakes.KODI.infolabel_calls, kodi_fakes.KODI.condition_calls), (1, 0))
+        # one combined condition when none of the windows of the rules is active
+        use_fixture({"container.content": "pvr"}, set(["videos"]))
+        self.assertEqual(get_current_content_type(), "")
+        self.assertEqual((kodi_fakes.KODI.infolabel_calls, kodi_fakes.KODI.condition_calls), (1, 1))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+    script.skin.helper.service
+    Helper service and scripts for Kodi skins
+    test_infolabels.py
+    Tests for reading many infolabels with a single call
+'''
+
+import re
+import unittest
+import kodi_fakes
+kodi_fakes.install()
+from utils import get_infolabels, INFOLABEL_SEPARATOR
+
+
+class TestGetInfolabels(unittest.TestCase):
+
+    def use_labels(self, labels):
+        '''the fake kodi answers single labels and $INFO[] templates from the dict'''
+        kodi_fakes.KODI.reset()
+        infolabel = lambda label: labels.get(label, "").encode("utf-8")
+        kodi_fakes.KODI.infolabel = lambda label: re.sub(
+            r"\$INFO\[(.*?)\]", lambda match: infolabel(match.group(1)), label) if "$INFO[" in label \
+            else infolabel(label)
+
+    def test_single_call(self):
+        self.use_labels({"ListItem.Title": u"Amélie", "ListItem.Year": "2001"})
+        self.assertEqual(get_infolabels(["Title", "Year", "Genre"], "ListItem."),
+                         {"Title": u"Amélie", "Year": "2001", "Genre": ""})
+        self.assertEqual(kodi_fakes.KODI.infolabel_calls, 1)
+
+    def test_empty_values(self):
+        self.use_labels({})
+        self.assertEqual(get_infolabels(["ListItem.Title", "ListItem.Plot"]),
+                         {"ListItem.Title": "", "ListItem.Plot": ""})
+        self.assertEqual(get_infolabels([]), {})
+
+    def test_value_with_separator(self):
+        # the split gives too many values, the labels are read one by one
+        self.use_labels({"ListItem.Title": u"a%sb" % INFOLABEL_SEPARATOR, "ListItem.Plot": "c"})
+        self.assertEqual(get_infolabels(["ListItem.Title", "ListItem.Plot", "ListItem.Genre"]), {
+            "ListItem.Title": u"a%sb" % INFOLABEL_SEPARATOR, "ListItem.Plot": "c", "ListItem.Genre": ""})
+        self.assertEqual(kodi_fakes.KODI.infolabel_calls, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+    script.skin.helper.service
+    Helper service and scripts for Kodi skins
+    test_library_preload.py
+    Tests for the bulk preload of the library folders
+'''
+
+import json
+import unittest
+import urllib
+import kodi_fakes
+kodi_fakes.install()
+from library_preload import LibraryPreload
+
+FOLDER = "videodb://movies/titles/"
+
+
+class FakeMetadataUtils(object):
+    '''the image helper of metadatautils, the per item lookups must not be used'''
+
+    def __init__(self):
+        self.streamdetails_calls = 0
+
+    def get_streamdetails(self, dbid, mediatype):
+        self.streamdetails_calls += 1
+        return {}
+
+    @staticmethod
+    def get_clean_image(image):
+        if image.startswith("image://"):
+            image = urllib.unquote(image[len("image://"):]).rstrip("/")
+        return image
+
+
+def movie(movieid):
+    return {"movieid": movieid, "label": "Movie %s" % movieid, "title": "Movie %s" % movieid,
+            "premiered": "2004-09-22", "year": 2004, "thumbnail": "image://%2fmedia%2fthumb.jpg/",
+            "art": {"poster": "image://http%3a%2f%2fexample.org%2fposter.jpg/"},
+            "streamdetails": {"audio": [{"codec": "ac3", "channels": 6, "language": "eng"},
+                                        {"codec": "dca", "channels": 2, "language": ""}],
+                              "subtitle": [{"language": "dut"}, {"language": "dut"}],
+                              "video": [{"codec": "h264", "width": 1920, "height": 1080}]}}
+
+
+class TestLibraryPreload(unittest.TestCase):
+
+    def setUp(self):
+        self.metadatautils = FakeMetadataUtils()
+        self.preload = LibraryPreload(self.metadatautils)
+        self.movies = [movie(movieid) for movieid in range(1, 301)]
+        self.requests = []
+        kodi_fakes.KODI.reset()
+        kodi_fakes.KODI.jsonrpc = self.jsonrpc
+
+    def jsonrpc(self, request):
+        self.requests.append(json.loads(request))
+        limits = self.requests[-1]["params"]["limits"]
+        return json.dumps({"result": {"movies": self.movies[limits["start"]:limits["end"]]}})
+
+    def test_preload(self):
+        self.preload.preload(FOLDER, lambda: False)
+        self.assertEqual(self.preload.folder, FOLDER)
+        self.assertEqual(len(self.preload.cache), 300)
+        values = self.preload.get("movie", 42)
+        self.assertEqual(values["title"], "Movie 42")
+        self.assertEqual(values["premiered"], "22/09/2004")
+        self.assertEqual(values["Art(poster)"], "http://example.org/poster.jpg")
+        self.assertEqual(values["thumb"], "/media/thumb.jpg")
+        self.assertNotIn("label2", values)
+
+    def test_streamdetails(self):
+        self.preload.preload(FOLDER, lambda: False)
+        self.assertEqual(self.preload.get_streamdetails("movie", 7), {
+            "AudioStreams.0": "eng - Dolby D - 5.1", "AudioStreams.1": "DTS - 2.0", "SubtitleStreams.0": "dut",
+            "audiostreams": ["eng - Dolby D - 5.1", "DTS - 2.0"], "languages": ["eng"], "subtitles": ["dut"],
+            "videoheight": 1080, "videowidth": 1920})
+        self.assertEqual(self.preload.get_streamdetails("movie", 999), None)
+        # the bulk queries return the streamdetails, there is no call per item
+        self.assertEqual(len(self.requests), 2)
+        self.assertTrue(all("streamdetails" in request["params"]["properties"] for request in self.requests))
+        self.assertEqual(self.metadatautils.streamdetails_calls, 0)
+
+    def test_cancelled_on_entry(self):
+        self.preload.preload(FOLDER, lambda: True)
+        self.assertEqual(self.preload.folder, "")
+        self.assertEqual(len(self.preload.cache), 0)
+
+    def test_cancelled_between_pages(self):
+        pages = []
+        self.preload.preload(FOLDER, lambda: pages.append(1) or len(pages) > 1)
+        self.assertEqual(self.preload.folder, "")
+        self.assertEqual(len(self.preload.cache), 250)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+    script.skin.helper.service
+    Helper service and scripts for Kodi skins
+    test_player_prefetch.py
+    Tests for the eviction of the prefetched player properties
+'''
+
+import unittest
+import kodi_fakes
+kodi_fakes.install()
+from invalidation_bus import InvalidationBus
+from metrics import Metrics
+from player_prefetch import PlayerPrefetch, library_key, video_key
+
+
+class TestPlayerPrefetch(unittest.TestCase):
+
+    def setUp(self):
+        self.bus = InvalidationBus()
+        self.prefetch = PlayerPrefetch(Metrics())
+        self.bus.subscribe(self.prefetch.invalidate)
+        self.movie_keys = [video_key(u"Up", u"2009", u""), library_key("movie", 12)]
+        self.prefetch.set(self.movie_keys, {"title": "Up"}, "video", "movie", 12)
+        self.prefetch.set([video_key(u"Lost", u"2004", u"")], {"title": "Lost"}, "video")
+
+    def test_item_update_evicts_all_keys(self):
+        self.bus.on_notification("VideoLibrary.OnRemove", "movie", 12)
+        self.assertEqual([self.prefetch.get(key) for key in self.movie_keys], [None, None])
+        self.assertEqual(self.prefetch.get(video_key(u"Lost", u"2004", u"")), {"title": "Lost"})
+
+    def test_clean_evicts_the_library(self):
+        self.bus.on_notification("AudioLibrary.OnCleanFinished")
+        self.assertEqual(self.prefetch.get(self.movie_keys[0]), {"title": "Up"})
+        self.bus.on_notification("VideoLibrary.OnCleanFinished")
+        self.assertEqual(self.prefetch.get(self.movie_keys[0]), None)
+        self.assertEqual(self.prefetch.get(video_key(u"Lost", u"2004", u"")), None)
+
+
+if __name__ == "__main__":
+    unittest.main()
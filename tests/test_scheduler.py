@@ -0,0 +1,79 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+    script.skin.helper.service
+    Helper service and scripts for Kodi skins
+    test_scheduler.py
+    Tests for the timer thread of the scheduler
+'''
+
+import threading
+import time
+import unittest
+import kodi_fakes
+kodi_fakes.install()
+from scheduler import Scheduler, monotonic, POOL_PLAYER, ALARM_SLICE
+
+
+class TestScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = Scheduler()
+        self.wakeups = []
+        wait = self.scheduler._cond.wait
+
+        def counting_wait(timeout=None):
+            self.wakeups.append(timeout)
+            wait(timeout)
+        self.scheduler._cond.wait = counting_wait
+        self.scheduler.start()
+
+    def tearDown(self):
+        self.scheduler.stop()
+
+    def test_idle_timer_does_not_poll(self):
+        ran = threading.Event()
+        self.scheduler.schedule("later", ran.set, delay=0.5, repeat=False)
+        ran.wait(2)
+        self.assertTrue(ran.is_set())
+        # one wait untill the alarm, one after the task: no timed waits which python 2 implements by polling
+        self.assertTrue(len(self.wakeups) <= 3, self.wakeups)
+        self.assertEqual([timeout for timeout in self.wakeups if timeout is not None], [])
+
+    def test_earlier_task_wakes_the_timer(self):
+        ran = []
+        self.scheduler.schedule("far", lambda: ran.append("far"), delay=60, repeat=False)
+        time.sleep(0.05)
+        start = monotonic()
+        self.scheduler.schedule("near", lambda: ran.append(monotonic() - start), delay=0.1, repeat=False)
+        time.sleep(0.5)
+        self.assertEqual(len(ran), 1)
+        # the sleeping alarm picks up the earlier deadline within a slice
+        self.assertTrue(0.1 <= ran[0] < 0.15 + ALARM_SLICE, ran)
+
+    def test_rescheduling_starts_no_threads(self):
+        time.sleep(0.05)
+        threads = threading.active_count()
+        for count in range(50):
+            self.scheduler.schedule("flush", lambda: None, delay=0.5 - count * 0.005, repeat=False)
+        time.sleep(0.05)
+        self.assertEqual(threading.active_count(), threads)
+
+    def test_pools(self):
+        ran = threading.Event()
+        self.scheduler.schedule("busy", lambda: time.sleep(0.5), delay=0, repeat=False, background=True)
+        self.scheduler.schedule("busy2", lambda: time.sleep(0.5), delay=0, repeat=False, background=True)
+        # the background workers are busy, the player worker is not
+        self.scheduler.schedule("stream", ran.set, delay=0.05, repeat=False, background=True, pool=POOL_PLAYER)
+        self.assertTrue(ran.wait(0.3) or ran.is_set())
+
+    def test_repeating_task(self):
+        runs = []
+        self.scheduler.schedule("repeat", lambda: runs.append(1), interval=0.05, delay=0)
+        time.sleep(0.28)
+        self.assertTrue(4 <= len(runs) <= 7, len(runs))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+    script.skin.helper.service
+    Helper service and scripts for Kodi skins
+    test_window_props.py
+    Tests for the bookkeeping of the window properties
+'''
+
+import unittest
+import kodi_fakes
+kodi_fakes.install()
+from utils import prepare_win_props
+from window_props import WindowProperties, DoubleBufferedProperties
+
+
+class TestWindowProperties(unittest.TestCase):
+
+    def setUp(self):
+        self.win = kodi_fakes.FakeWindow()
+        self.props = WindowProperties(self.win)
+
+    def test_only_differences_are_written(self):
+        self.props.set_props(prepare_win_props({"title": "A", "plot": "x"}))
+        self.props.set_props(prepare_win_props({"title": "A", "year": 2000}))
+        self.assertEqual(self.win.props, {"skinhelper.listitem.title": "A", "skinhelper.listitem.year": "2000"})
+        self.assertEqual(self.win.set_calls, 3)
+        self.assertEqual(self.win.clear_calls, 1)
+
+
+class TestDoubleBufferedProperties(unittest.TestCase):
+
+    def setUp(self):
+        self.win = kodi_fakes.FakeWindow()
+        self.props = DoubleBufferedProperties(self.win, u"SkinHelper.ListItem.")
+
+    def visible(self):
+        '''the properties in the namespace the generation property points at'''
+        prefix = u"skinhelper.listitem%s." % self.win.getProperty("SkinHelper.ListItem.Gen").lower()
+        return dict((key[len(prefix):], value) for key, value in self.win.props.iteritems()
+                    if key.startswith(prefix))
+
+    def test_keys_land_in_the_buffers(self):
+        self.props.set_props(prepare_win_props({"title": "A", "plot": "x"}))
+        self.assertEqual(self.win.getProperty("SkinHelper.ListItem.Gen"), "B")
+        self.assertEqual(self.win.getProperty("SkinHelper.ListItemB.Title"), "A")
+        self.props.set_props(prepare_win_props({"title": "B"}))
+        self.assertEqual(self.win.getProperty("SkinHelper.ListItem.Gen"), "A")
+        self.assertEqual(self.win.getProperty("SkinHelper.ListItemA.Title"), "B")
+        self.assertFalse([key for key in self.win.props if key.startswith("skinhelper.listitem.")
+                          and key != "skinhelper.listitem.gen"])
+
+    def test_stale_keys_are_cleared(self):
+        self.props.set_props(prepare_win_props({"title": "A", "plot": "x"}))
+        self.props.set_props(prepare_win_props({"title": "B"}))
+        self.assertEqual(self.visible(), {"title": "B"})
+        self.props.set_props(prepare_win_props({"title": "C", "year": 2000}))
+        self.assertEqual(self.visible(), {"title": "C", "year": "2000"})
+        self.props.set_props(prepare_win_props({"title": "D"}))
+        self.assertEqual(self.visible(), {"title": "D"})
+        self.assertNotIn("skinhelper.listitemb.plot", self.win.props)
+
+    def test_clear(self):
+        self.props.set_props(prepare_win_props({"title": "A"}))
+        self.props.clear()
+        self.assertEqual(self.visible(), {})
+        self.props.clear_all()
+        self.assertEqual(self.win.props, {})
+
+
+if __name__ == "__main__":
+    unittest.main()